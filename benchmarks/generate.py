@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import argparse, base64, json, os, random, sys
+
+CERTIFICATE = """-----BEGIN CERTIFICATE-----
+MIIBqzCCARQCAQEwDQYJKoZIhvcNAQELBQAwHDEaMBgGA1UEAwwRYmVuY2htYXJr
+LmV4YW1wbGUwIhgPMjAyNDAxMDEwMDAwMDBaGA8yMDM0MDEwMTAwMDAwMFowHDEa
+MBgGA1UEAwwRYmVuY2htYXJrLmV4YW1wbGUwgZ8wDQYJKoZIhvcNAQEBBQADgY0A
+MIGJAoGBAMgxpmQ18ELoTB2TMrvEpYO5orDzDb98lGWeJCBD+JvgS6QsUO5QKKUp
+1iybQFIjACVlv3Znj4ElSqA6E91Ytx71utXCP+2Fbx4qVjFpBLZlQurKcwPcKRUd
+ce1pzluSSqia4OQH/HFO5Q2JSgWdCbw6h8sWcHKSQc7AeOZNqBWLAgMBAAEwDQYJ
+KoZIhvcNAQELBQADgYEADLwzQeOLe05X/zSNgZDRjHU1QvHP0Ox2WngHEZQJTRzJ
+AiyBh0ojOeZjSW87mHFkwoeAZ7ViqrI6jdbFnBPeutHbwwmmVrnc0K8f1Kmf1Tk1
+yd/YvOSOE0YKyD/tGFgLeMNAh/XmY+0mniuJMqpYFkUznAAmQ1Pv8Fh3UWBoNxA=
+-----END CERTIFICATE-----"""
+
+WORDS = ["account", "activity", "adapter", "buffer", "builder", "cache", "callback", "channel", "client", "config", "context", "controller", "data", "delegate", "event", "factory", "fragment", "handler", "helper", "index", "layout", "listener", "manager", "model", "module", "network", "object", "parser", "provider", "queue", "render", "request", "response", "service", "session", "state", "stream", "string", "task", "thread", "value", "view", "widget", "worker"]
+
+TEXTS = ["txt", "json", "xml", "properties", "java", "kt", "py", "swift", "yaml"]
+
+BINARIES = ["so", "dex", "bin", "dylib"]
+
+KINDS = [("text", 5), ("minified", 2), ("javascript", 1), ("binary", 2)]
+
+class Generator:
+
+	def __init__(self, seed: int, density: int):
+		"""
+		Class for generating a deterministic synthetic corpus, i.e., the same seed always generates the same files.\n
+		The density is the number of planted secrets per 100 lines of filler text.
+		"""
+		self.__random  = random.Random(seed)
+		self.__density = density
+		self.__planted : dict[str, int] = {}
+
+	def get_planted(self):
+		"""
+		Get the number of planted secrets for each default template entry.
+		"""
+		return dict(sorted(self.__planted.items()))
+
+	def get_size(self, size: int):
+		"""
+		Get a random file size between half and one and a half of the specified average size.
+		"""
+		return self.__random.randint(size // 2, size * 3 // 2)
+
+	def get_file(self, size: int) -> tuple[str, bytes]:
+		"""
+		Get the extension and the content of a random file of approximately the specified size.
+		"""
+		kind = self.__random.choices([kind for kind, weight in KINDS], [weight for kind, weight in KINDS])[0]
+		if kind == "binary":
+			return self.__random.choice(BINARIES), self.__get_binary(size)
+		elif kind == "minified":
+			return "js", self.__get_minified(size).encode()
+		elif kind == "javascript":
+			return "js", self.__get_text(size).encode()
+		return self.__random.choice(TEXTS), self.__get_text(size).encode()
+
+	def __get_word(self):
+		"""
+		Get a random word.
+		"""
+		return self.__random.choice(WORDS)
+
+	def __get_token(self, length: int, alphabet: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"):
+		"""
+		Get a random token of the specified length.
+		"""
+		return ("").join(self.__random.choice(alphabet) for _ in range(length))
+
+	def __get_line(self):
+		"""
+		Get a line of filler code without any secrets.
+		"""
+		return f"{self.__get_word()}{self.__get_word().capitalize()}.{self.__get_word()}({self.__random.randint(0, 999)}, {self.__get_word()});"
+
+	def __get_secret(self):
+		"""
+		Get a random secret for one of the default template entries, and the entry's key.
+		"""
+		key, secret = self.__random.choice([
+			("Auth."    , lambda: f"headers.put(\"Authorization\", \"Bearer {self.__get_token(40)}\");"),
+			("Variables", lambda: f"api_key = \"{self.__get_token(32)}\";"),
+			("Comments" , lambda: f"// TODO: fix the security issue in the {self.__get_word()} {self.__get_word()}"),
+			("Abs. URL" , lambda: f"url = \"https://{self.__get_word()}.example.com/{self.__get_word()}?id={self.__random.randint(0, 99999)}\";"),
+			("IPv4"     , lambda: f"host = \"10.{self.__random.randint(0, 255)}.{self.__random.randint(0, 255)}.{self.__random.randint(1, 254)}\";"),
+			("Base64"   , lambda: f"blob = \"{base64.b64encode(f'{self.__get_word()}:{self.__get_token(12)}'.encode()).decode()}\";"),
+			("HEX"      , lambda: f"salt = \"{f'{self.__get_word()}-{self.__get_token(8)}'.encode().hex()}\";"),
+			("PEM"      , lambda: f"cert = `{CERTIFICATE}`;"),
+			("JWT"      , lambda: f"jwt = \"{self.__get_jwt()}\";")
+		])
+		return key, secret()
+
+	def __get_jwt(self):
+		"""
+		Get a random JSON Web Token.
+		"""
+		encode = lambda value: base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+		return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'sub': self.__get_token(8), 'iat': self.__random.randint(1000000000, 2000000000)})}.{self.__get_token(43, 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')}"
+
+	def __get_lines(self, size: int, multiline: bool = True) -> list[str]:
+		"""
+		Get lines of filler code with planted secrets, totalling approximately the specified size, and count the planted secrets.\n
+		If multiline is 'False', comments and secrets spanning multiple lines, i.e., certificates, are not planted.
+		"""
+		tmp = []
+		length = 0
+		while length < size:
+			key, line = self.__get_secret() if self.__random.randint(1, 100) <= self.__density else ("", self.__get_line())
+			if not multiline and key in ["Comments", "PEM"]:
+				continue
+			if key:
+				self.__planted[key] = self.__planted.get(key, 0) + 1
+			tmp.append(line)
+			length += len(line) + 1
+		return tmp
+
+	def __get_text(self, size: int):
+		"""
+		Get a text file, one statement per line.
+		"""
+		return ("\n").join(self.__get_lines(size)) + "\n"
+
+	def __get_minified(self, size: int):
+		"""
+		Get a minified JavaScript (.js) file, i.e., a single line.
+		"""
+		return (";").join(line.rstrip(";") for line in self.__get_lines(size, False))
+
+	def __get_binary(self, size: int):
+		"""
+		Get a fake binary file, i.e., random bytes with embedded ASCII and UTF-16LE strings.
+		"""
+		tmp = bytearray()
+		while len(tmp) < size:
+			tmp += self.__random.randbytes(self.__random.randint(16, 256))
+			for line in self.__get_lines(self.__random.randint(32, 256)):
+				tmp += b"\x00" + (line.encode("UTF-16LE") if self.__random.randint(0, 3) == 0 else line.encode()) + b"\x00"
+		return bytes(tmp)
+
+def parse_size(value: str):
+	"""
+	Parse a number with an optional 'KB', 'MB', or 'GB' unit.
+	"""
+	value = value.upper()
+	for unit, multiplier in [("KB", 1024), ("MB", 1024 ** 2), ("GB", 1024 ** 3), ("", 1)]:
+		if value.endswith(unit):
+			return int(value.removesuffix(unit).strip() if unit else value) * multiplier
+
+def main():
+	parser = argparse.ArgumentParser(description = "Generate a deterministic synthetic corpus of text files, minified JavaScript files, and fake binaries with planted secrets.")
+	parser.add_argument("-o"  , "--out"    , required = True , type = str                         , help = "output directory, must not exist")
+	parser.add_argument("-n"  , "--files"  , required = False, type = int       , default = 1000   , help = "number of files (default: 1000)")
+	parser.add_argument("-s"  , "--size"   , required = False, type = parse_size, default = "64KB" , help = "average file size, e.g., 64KB or 2MB (default: 64KB)")
+	parser.add_argument("-l"  , "--large"  , required = False, type = int       , default = 0      , help = "number of additional large files, 100 times the average size (default: 0)")
+	parser.add_argument("-d"  , "--density", required = False, type = int       , default = 5      , help = "planted secrets per 100 lines (default: 5)")
+	parser.add_argument("-sd" , "--seed"   , required = False, type = int       , default = 1      , help = "random seed (default: 1)")
+	args = parser.parse_args()
+	if os.path.exists(args.out):
+		print(f"\"{args.out}\" already exists")
+		sys.exit(1)
+	generator = Generator(args.seed, args.density)
+	sizes = [generator.get_size(args.size) for _ in range(args.files)] + [args.size * 100] * args.large
+	total = 0
+	for i, size in enumerate(sizes):
+		extension, content = generator.get_file(size)
+		directory = os.path.join(args.out, f"dir{i % 10}", f"sub{i % 7}")
+		os.makedirs(directory, exist_ok = True)
+		with open(os.path.join(directory, f"file{i}.{extension}"), "wb") as stream:
+			stream.write(content)
+		total += len(content)
+	print(f"Files generated: {len(sizes)}")
+	print(f"Total size: {total} B")
+	print(f"Planted secrets: {json.dumps(generator.get_planted())}")
+
+if __name__ == "__main__":
+	main()
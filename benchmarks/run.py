@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+from file_scraper.utils import chunk, config, directory, engine, extract, file, grep, prefilter, rabin, string, template, writer
+
+import argparse, contextlib, dataclasses, io, json, platform, resource, tempfile, time
+
+STAGES = ["walk", "extract", "match", "decode", "scrape", "report (html)", "report (jsonl)"]
+"""
+Benchmarked stages, in the order they are run.
+"""
+
+REPORTS = {"report (html)": "html", "report (jsonl)": "jsonl"}
+"""
+Output file extension of each report stage.
+"""
+
+@dataclasses.dataclass
+class Stage:
+	"""
+	Class for storing the timing of a single stage.
+	"""
+	wall : float = 0
+	cpu  : float = 0
+	files: int   = 0
+	bytes: int   = 0
+
+	@contextlib.contextmanager
+	def measure(self, files: int = 0, bytes: int = 0):
+		"""
+		Add the wall and CPU time of the block to the stage, as well as the number of files and bytes processed.
+		"""
+		wall = time.perf_counter()
+		cpu = time.process_time()
+		try:
+			yield
+		finally:
+			self.wall += time.perf_counter() - wall
+			self.cpu += time.process_time() - cpu
+			self.files += files
+			self.bytes += bytes
+
+	def to_dict(self):
+		"""
+		Get the stage's timing, and its throughput in files per second and MB per second.
+		"""
+		return {
+			"wall"   : round(self.wall, 6),
+			"cpu"    : round(self.cpu, 6),
+			"files"  : self.files,
+			"bytes"  : self.bytes,
+			"files/s": round(self.files / self.wall, 2) if self.wall else 0,
+			"MB/s"   : round(self.bytes / self.wall / 1024 ** 2, 2) if self.wall else 0
+		}
+
+class Benchmark:
+
+	def __init__(
+		self,
+		path     : str,
+		template : template.Template,
+		extractor: extract.Extractor
+	):
+		"""
+		Class for timing each stage of file scraping separately, on a single thread.\n
+		The extract, match, and decode stages reproduce the engine's steps one by one, while the scrape stage runs the whole engine, and the report stages write its results.\n
+		The decoding cache is cleared before the engine's steps and before the scrape stage, so neither is timed with the other's cached values.
+		"""
+		self.__path      = path
+		self.__template  = template
+		self.__prefilter = prefilter.Prefilter(template)
+		self.__extractor = extractor
+		self.__engine    = engine.Engine(template, extractor)
+		self.__stages    = {name: Stage() for name in STAGES}
+		self.__matches   : dict[str, int] = {}
+		self.__decoded   = [0, 0]
+
+	def run(self):
+		"""
+		Run all the stages, and get their timings.
+		"""
+		stage = self.__stages["walk"]
+		with stage.measure():
+			files = list(directory.walk(self.__path))
+		stage.files = len(files)
+		stage.bytes = sum(entry.stat.st_size for entry in files)
+		string.decode.cache_clear()
+		for entry in files:
+			self.__run_engine_steps(entry)
+		string.decode.cache_clear()
+		with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+			documents = {name: writer.get_writer(self.__template, os.path.join(tmp, f"results.{extension}")) for name, extension in REPORTS.items()}
+			for entry in files:
+				with self.__stages["scrape"].measure(1, entry.stat.st_size):
+					results = self.__engine.run(entry.path)
+				if results.results:
+					for name, document in documents.items():
+						with self.__stages[name].measure(1, entry.stat.st_size):
+							document.add(results)
+			for name, document in documents.items():
+				with self.__stages[name].measure():
+					document.close()
+		return {
+			"stages" : {name: stage.to_dict() for name, stage in self.__stages.items()},
+			"matches": dict(sorted(self.__matches.items())),
+			"decoded": {"attempts": self.__decoded[0], "successes": self.__decoded[1]}
+		}
+
+	def __run_engine_steps(self, found: directory.File):
+		"""
+		Extract the text of a single file, find all the matches, and decode them, timing each step separately.
+		"""
+		with self.__stages["extract"].measure(1, found.stat.st_size):
+			text = ("").join(file.stream(found.path) if file.is_text(found.path) else rabin.stream(found.path) if self.__extractor == extract.Extractor.RABIN2 else extract.stream(found.path))
+		candidates = []
+		with self.__stages["match"].measure(1, len(text)):
+			for part in chunk.split([text], config.CHUNK_SIZE, config.CHUNK_OVERLAP):
+				for key, spans in self.__prefilter.scan(part.text).items():
+					entry = self.__template.entries[key]
+					matches, error = grep.find_matches(part.text, entry.matcher.search or entry.matcher.query, spans, 0, part.owned)
+					self.__matches[key] = self.__matches.get(key, 0) + len(matches)
+					if entry.decode != template.Encoding.NONE:
+						for start, end, value, offset in matches:
+							candidates.extend((matched, entry.decode) for matched in (entry.matcher.query.findall(value) if entry.search else [value]))
+		with self.__stages["decode"].measure(1 if candidates else 0, sum(len(matched) for matched, encoding in candidates)):
+			for matched, encoding in candidates:
+				self.__decoded[0] += 1
+				self.__decoded[1] += bool(string.decode(matched, encoding))
+
+def get_peak_rss():
+	"""
+	Get the peak resident set size of the current process in bytes.
+	"""
+	tmp = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return tmp if sys.platform == "darwin" else tmp * 1024
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+	"""
+	Compare the wall time of each stage to a baseline.\n
+	Returns the stages slower than the baseline by more than the tolerance.
+	"""
+	tmp = []
+	for name, stage in results["stages"].items():
+		previous = baseline.get("stages", {}).get(name)
+		if previous and previous["wall"] and stage["wall"] > previous["wall"] * (1 + tolerance):
+			tmp.append(f"{name}: {previous['wall']:.3f}s -> {stage['wall']:.3f}s (+{(stage['wall'] / previous['wall'] - 1) * 100:.0f}%)")
+	return tmp
+
+def main():
+	parser = argparse.ArgumentParser(description = "Time each stage of file scraping on a corpus, e.g., one created with 'generate.py', and optionally compare the timings to a baseline.")
+	parser.add_argument("-dir", "--directory", required = True , type = str                      , help = "corpus directory")
+	parser.add_argument("-t"  , "--template" , required = False, type = str  , default = ""      , help = "template file (default: built-in)")
+	parser.add_argument("-x"  , "--extractor", required = False, type = str  , default = "native", help = "extractor for binary files: native or rabin2 (default: native)")
+	parser.add_argument("-r"  , "--repeat"   , required = False, type = int  , default = 1       , help = "number of runs, the fastest run of each stage is kept (default: 1)")
+	parser.add_argument("-o"  , "--out"      , required = False, type = str  , default = ""      , help = "output JSON file")
+	parser.add_argument("-b"  , "--baseline" , required = False, type = str  , default = ""      , help = "baseline JSON file from a previous run, exits with 1 on a regression")
+	parser.add_argument("-tl" , "--tolerance", required = False, type = float, default = 0.2     , help = "allowed slowdown relative to the baseline (default: 0.2, i.e., 20%%)")
+	args = parser.parse_args()
+	tmp, message = template.deserialize(file.read(args.template)) if args.template else template.load_default()
+	if not tmp:
+		print(f"Cannot load the template: {message}")
+		sys.exit(1)
+	results = None
+	for _ in range(max(args.repeat, 1)):
+		run = Benchmark(args.directory, tmp, extract.Extractor(args.extractor)).run()
+		if results:
+			for name, stage in run["stages"].items():
+				if stage["wall"] < results["stages"][name]["wall"]:
+					results["stages"][name] = stage
+		else:
+			results = run
+	results["peak_rss"] = get_peak_rss()
+	results["environment"] = {"version": config.APP_VERSION, "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+	print(f"{'Stage':<16}{'Wall (s)':>12}{'CPU (s)':>12}{'Files/s':>12}{'MB/s':>12}")
+	for name, stage in results["stages"].items():
+		print(f"{name:<16}{stage['wall']:>12.3f}{stage['cpu']:>12.3f}{stage['files/s']:>12.2f}{stage['MB/s']:>12.2f}")
+	print(f"Peak RSS: {results['peak_rss'] / 1024 ** 2:.1f} MB")
+	print(f"Decoded: {results['decoded']['successes']}/{results['decoded']['attempts']}")
+	print(f"Matches: {json.dumps(results['matches'])}")
+	if args.out:
+		with open(args.out, "w", encoding = "UTF-8") as stream:
+			json.dump(results, stream, indent = 4)
+		print(f"Results have been saved to '{args.out}'")
+	if args.baseline:
+		with open(args.baseline, "r", encoding = "UTF-8") as stream:
+			regressions = compare(results, json.load(stream), args.tolerance)
+		if regressions:
+			print("Regressions:")
+			for regression in regressions:
+				print(f"    {regression}")
+			sys.exit(1)
+		print("No regressions")
+
+if __name__ == "__main__":
+	main()
@@ -1,16 +1,42 @@
 #!/usr/bin/env python3
 
-from .utils import config, scrape, validate
+from .utils import config, merge, scrape, validate
 
 def main():
-	success, args = validate.Validate().validate_args()
-	if success:
+	validator = validate.Validate()
+	success, args = validator.validate_args()
+	if success and validator.is_merge():
+		config.banner()
+		merger = merge.FileMerger(
+			args.files,
+			args.template,
+			args.per_page,
+			args.page_size,
+			args.out
+		)
+		merger.run()
+	elif success:
 		config.banner()
 		scraper = scrape.FileScraper(
 			args.directory,
 			args.template,
+			args.extractor,
+			args.cache_dir,
 			args.beautify,
+			args.beautify_dir,
+			args.beautify_size,
+			args.split_size,
 			args.threads,
+			args.processes,
+			args.since,
+			args.manifest,
+			args.resumed,
+			args.dedup,
+			args.per_page,
+			args.page_size,
+			args.stats,
+			args.timeout,
+			args.retry_lines,
 			args.out,
 			args.debug
 		)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+from . import config
+
+import builtins, bz2, collections, contextlib, gzip, io, lzma, mmap, os, shutil, tarfile, tempfile, threading, typing, zipfile
+
+SEPARATOR = "!/"
+"""
+Separator between an archive's path and the name of its member, e.g., 'app.apk!/classes.dex'.
+"""
+
+__DECOMPRESSORS = {"gz": gzip.GzipFile, "tgz": gzip.GzipFile, "bz2": bz2.BZ2File, "tbz2": bz2.BZ2File, "xz": lzma.LZMAFile, "txz": lzma.LZMAFile}
+
+def get_kind(path: str):
+	"""
+	Get the kind of an archive, i.e., 'zip' or 'tar', based on its extension, or an empty string if the path is not an archive.
+	"""
+	name = path.rsplit(SEPARATOR, 1)[-1].lower()
+	for kind, extensions in [("zip", config.ZIP_ARCHIVES), ("tar", config.TAR_ARCHIVES)]:
+		if any(name.endswith(f".{extension}") for extension in extensions):
+			return kind
+	return ""
+
+def is_archive(path: str):
+	"""
+	Returns 'True' if a path is an archive, based on its extension.
+	"""
+	return bool(get_kind(path))
+
+def split(path: str) -> tuple[str, ...]:
+	"""
+	Split a path into the path of the outermost archive and the names of the nested members, e.g., 'app.apk!/lib.zip!/a.dex' into '("app.apk", "lib.zip", "a.dex")'.\n
+	A path that exists on the file system is never split.
+	"""
+	tmp = tuple(path.split(SEPARATOR))
+	if len(tmp) > 1 and os.path.exists(path):
+		tmp = (path,)
+	return tmp
+
+def is_member(path: str):
+	"""
+	Returns 'True' if a path is a member of an archive.
+	"""
+	return len(split(path)) > 1
+
+def get_members(path: str) -> list[tuple[str, int]]:
+	"""
+	Get the names and the uncompressed sizes of all the regular, non-empty files in an archive, which can itself be a member of another archive.
+	"""
+	with __acquire(split(path)) as archive:
+		return archive.get_members()
+
+def get_size(path: str):
+	"""
+	Get the size of a file, or the uncompressed size of an archive's member.
+	"""
+	names = split(path)
+	if len(names) == 1:
+		return os.path.getsize(path)
+	with __acquire(names[:-1]) as archive:
+		return archive.get_size(names[-1])
+
+@contextlib.contextmanager
+def open(path: str) -> typing.Iterator[typing.BinaryIO]:
+	"""
+	Open a file, or an archive's member, for reading in binary mode.\n
+	A member is decompressed as it is read, i.e., it is never extracted to disk, and the archives are kept open between the calls.
+	"""
+	names = split(path)
+	if len(names) == 1:
+		with builtins.open(path, "rb") as stream:
+			yield stream
+		return
+	with __acquire(names[:-1]) as archive, __open_member(archive, names[-1]) as stream:
+		yield stream
+
+@contextlib.contextmanager
+def get_buffer(path: str) -> typing.Iterator[bytes | mmap.mmap]:
+	"""
+	Get the content of a file, or an archive's member, as a buffer.\n
+	A file is memory-mapped, and so is a member larger than the spool size, once copied to a temporary file; a smaller member is read into memory.
+	"""
+	if is_member(path) and get_size(path) <= config.ARCHIVE_SPOOL_SIZE:
+		with open(path) as stream:
+			yield stream.read()
+		return
+	with __materialize(path) as file, builtins.open(file, "rb") as stream, mmap.mmap(stream.fileno(), 0, access = mmap.ACCESS_READ) as data:
+		yield data
+
+@contextlib.contextmanager
+def materialize(path: str) -> typing.Iterator[str]:
+	"""
+	Get a path on the file system for a file, or an archive's member, e.g., for an external tool.\n
+	A member is copied to a temporary file, which is removed at the end.
+	"""
+	with __materialize(path) as file:
+		yield file
+
+@contextlib.contextmanager
+def __materialize(path: str) -> typing.Iterator[str]:
+	"""
+	Get a path on the file system for a file, or an archive's member.
+	"""
+	if not is_member(path):
+		yield path
+		return
+	descriptor, tmp = tempfile.mkstemp(prefix = "file-scraper-", suffix = os.path.splitext(path)[1])
+	try:
+		with builtins.open(descriptor, "wb") as out, open(path) as stream:
+			shutil.copyfileobj(stream, out)
+		yield tmp
+	finally:
+		os.remove(tmp)
+
+# ----------------------------------------
+
+class __Section(io.RawIOBase):
+
+	def __init__(self, stream: typing.BinaryIO, lock: threading.Lock, offset: int, size: int):
+		"""
+		Class for reading a section of a shared stream, e.g., a member of an uncompressed tar archive.\n
+		Each read seeks the shared stream under the lock, so many sections of the same stream can be read in parallel.
+		"""
+		self.__stream   = stream
+		self.__lock     = lock
+		self.__offset   = offset
+		self.__size     = size
+		self.__position = 0
+
+	def readable(self):
+		return True
+
+	def readinto(self, buffer):
+		size = min(len(buffer), self.__size - self.__position)
+		if size <= 0:
+			return 0
+		with self.__lock:
+			self.__stream.seek(self.__offset + self.__position)
+			data = self.__stream.read(size)
+		buffer[:len(data)] = data
+		self.__position += len(data)
+		return len(data)
+
+class __Archive:
+
+	def __init__(self, stream: typing.BinaryIO, kind: str):
+		"""
+		Class for reading the members of an opened zip or tar archive, from many threads.\n
+		A tar archive must be uncompressed, i.e., compressed tar archives are decompressed to a spooled temporary file first.\n
+		The lock guards the stream of a tar archive, and the archive is not closed while it has users.
+		"""
+		self.stream  = stream
+		self.lock    = threading.Lock()
+		self.zip     = zipfile.ZipFile(stream) if kind == "zip" else None
+		self.members = {} if self.zip else {info.name: info for info in tarfile.open(fileobj = stream, mode = "r:").getmembers() if info.isreg() and not info.issparse()}
+		self.users   = 0
+
+	def get_members(self) -> list[tuple[str, int]]:
+		"""
+		Get the names and the uncompressed sizes of all the regular, non-empty files.
+		"""
+		if self.zip:
+			return [(info.filename, info.file_size) for info in self.zip.infolist() if not info.is_dir() and info.file_size > 0]
+		return [(name, info.size) for name, info in self.members.items() if info.size > 0]
+
+	def get_size(self, name: str):
+		"""
+		Get the uncompressed size of a member.
+		"""
+		return self.zip.getinfo(name).file_size if self.zip else self.members[name].size
+
+	def close(self):
+		"""
+		Close the archive.
+		"""
+		if self.zip:
+			self.zip.close()
+		self.stream.close()
+
+__archives: collections.OrderedDict[tuple[str, ...], __Archive] = collections.OrderedDict()
+
+__lock = threading.Lock()
+
+def __reset():
+	"""
+	Forget the archives opened by the parent process, e.g., in a forked worker process, as their file positions are shared with the parent process.
+	"""
+	global __archives, __lock
+	__archives = collections.OrderedDict()
+	__lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child = __reset)
+
+@contextlib.contextmanager
+def __acquire(names: tuple[str, ...]) -> typing.Iterator[__Archive]:
+	"""
+	Get an opened archive, which can itself be a member of another archive, and keep it open until released.\n
+	Up to the cache size of the least recently used archives are kept open, so the members of the same archive can be read one by one without opening it again.
+	"""
+	with __lock:
+		archive = __archives.get(names)
+		if archive:
+			__archives.move_to_end(names)
+			archive.users += 1
+	if not archive:
+		stream = __spool(names)
+		try:
+			archive = __Archive(stream, get_kind(names[-1]))
+		except Exception:
+			stream.close()
+			raise
+		with __lock:
+			if names in __archives:
+				archive.close()
+				archive = __archives[names]
+				__archives.move_to_end(names)
+			else:
+				__archives[names] = archive
+			archive.users += 1
+	try:
+		yield archive
+	finally:
+		with __lock:
+			archive.users -= 1
+			for key in [key for key, value in __archives.items() if not value.users][:max(len(__archives) - config.ARCHIVE_CACHE_SIZE, 0)]:
+				__archives.pop(key).close()
+
+def __open_member(archive: __Archive, name: str) -> typing.BinaryIO:
+	"""
+	Open a member of an opened archive for reading in binary mode.
+	"""
+	if archive.zip:
+		return archive.zip.open(name)
+	info = archive.members[name]
+	return io.BufferedReader(__Section(archive.stream, archive.lock, info.offset_data, info.size))
+
+def __spool(names: tuple[str, ...]) -> typing.BinaryIO:
+	"""
+	Open the stream of an archive, which can itself be a member of another archive.\n
+	An uncompressed archive on the file system is opened as is, while a nested or a compressed tar archive is copied to a spooled temporary file, i.e., in memory up to the spool size.
+	"""
+	extension = names[-1].rsplit(".", 1)[-1].lower()
+	decompress = __DECOMPRESSORS.get(extension) if get_kind(names[-1]) == "tar" else None
+	if len(names) == 1 and not decompress:
+		return builtins.open(names[0], "rb")
+	tmp = tempfile.SpooledTemporaryFile(max_size = config.ARCHIVE_SPOOL_SIZE)
+	try:
+		with open(SEPARATOR.join(names)) as stream:
+			shutil.copyfileobj(decompress(fileobj = stream) if decompress else stream, tmp)
+		tmp.seek(0)
+	except Exception:
+		tmp.close()
+		raise
+	return tmp
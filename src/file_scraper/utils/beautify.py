@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from . import archive, config, file
+
+import os, signal
+
+def is_beautified(text: str):
+	"""
+	Returns 'True' if a JavaScript text is already formatted, i.e., if its average line length is below the minified line length.
+	"""
+	return len(text) / (text.count("\n") + 1) < config.MINIFIED_LINE_LENGTH
+
+def get_path(directory: str, digest: str):
+	"""
+	Get the full path to the beautified copy of a file, by the file's content hash.
+	"""
+	return os.path.join(directory, f"{digest}.js")
+
+def run(path: str, directory: str, maximum: int = 0):
+	"""
+	Beautify a JavaScript (.js) file to the specified directory, keyed by the file's content hash, so the file itself is never modified.\n
+	An existing beautified copy of the same content is reused.\n
+	Returns the full path to the file to scrape, i.e., to the beautified copy, or to the file itself if it is larger than the maximum size, already formatted, or cannot be beautified.
+	"""
+	try:
+		if maximum and archive.get_size(path) > maximum:
+			return path
+		out = get_path(directory, file.get_hash(path))
+		if os.path.isfile(out):
+			return out
+		text, message = file.read_text(path)
+		if message or is_beautified(text):
+			return path
+		return out if file.beautify(text, out) else path
+	except Exception:
+		return path
+
+def init_worker():
+	"""
+	Initialize a worker process.\n
+	The worker process ignores CTRL + C, which is handled by the main process.
+	"""
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+from . import result
+
+import os, sqlite3, threading
+
+class Cache:
+
+	def __init__(self, directory: str):
+		"""
+		Class for caching the results of each template entry by file content hash, entry fingerprint, and backend version.\n
+		The class can be pickled, i.e., it can be sent to worker processes, and each thread opens its own connection.
+		"""
+		self.__path  = os.path.join(directory, "cache.db")
+		self.__local = threading.local()
+		connection = self.__connect()
+		connection.execute("CREATE TABLE IF NOT EXISTS results (digest TEXT, fingerprint TEXT, backend TEXT, data TEXT, PRIMARY KEY (digest, fingerprint, backend))")
+		connection.commit()
+
+	def __getstate__(self):
+		return {"path": self.__path}
+
+	def __setstate__(self, state: dict):
+		self.__path  = state["path"]
+		self.__local = threading.local()
+
+	def __connect(self) -> sqlite3.Connection:
+		"""
+		Get the connection of the current thread.
+		"""
+		connection = getattr(self.__local, "connection", None)
+		if not connection:
+			connection = sqlite3.connect(self.__path, timeout = 60)
+			connection.execute("PRAGMA journal_mode = WAL")
+			connection.execute("PRAGMA synchronous = NORMAL")
+			self.__local.connection = connection
+		return connection
+
+	def get(self, digest: str, fingerprints: dict[str, str], backend: str) -> dict[str, list[result.Result]]:
+		"""
+		Get the cached results of each template entry for a file, by the entry fingerprints.\n
+		Entries that are not cached are omitted.\n
+		Returns an empty dictionary on failure.
+		"""
+		tmp = {}
+		try:
+			keys = {fingerprint: key for key, fingerprint in fingerprints.items()}
+			rows = self.__connect().execute(
+				f"SELECT fingerprint, data FROM results WHERE digest = ? AND backend = ? AND fingerprint IN ({(', ').join('?' * len(keys))})",
+				(digest, self.__get_backend(backend), *keys)
+			)
+			for fingerprint, data in rows:
+				tmp[keys[fingerprint]] = result.deserialize(data)
+		except Exception:
+			tmp = {}
+		return tmp
+
+	def set(self, digest: str, fingerprints: dict[str, str], backend: str, results: dict[str, list[result.Result]]):
+		"""
+		Cache the results of each template entry for a file, including the entries without any results.\n
+		Failures are silently ignored.
+		"""
+		try:
+			connection = self.__connect()
+			connection.executemany(
+				"INSERT OR REPLACE INTO results (digest, fingerprint, backend, data) VALUES (?, ?, ?, ?)",
+				[(digest, fingerprint, self.__get_backend(backend), result.serialize(results.get(key, []))) for key, fingerprint in fingerprints.items()]
+			)
+			connection.commit()
+		except Exception:
+			pass
+
+	def __get_backend(self, backend: str):
+		"""
+		Get the backend version, including the version of the cached data.
+		"""
+		return f"{backend}:{result.SCHEMA}"
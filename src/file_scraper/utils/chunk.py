@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+import dataclasses, typing
+
+@dataclasses.dataclass
+class Chunk:
+	"""
+	Class for storing a single chunk of a text stream.
+	"""
+	text : str
+	base : int
+	owned: int
+
+def split(pieces: typing.Iterable[str], size: int, overlap: int) -> typing.Iterator[Chunk]:
+	"""
+	Split a stream of text pieces into chunks of at least the specified size, ending on line boundaries whenever possible.\n
+	Each chunk overlaps the next one by at least the specified number of characters, starting on a line boundary whenever possible.\n
+	Matches starting at or after 'Chunk.owned' belong to the next chunk, so no match shorter than the overlap is split or reported twice.\n
+	At most one chunk, its overlap, and one piece are kept in memory at a time.
+	"""
+	base = 0
+	carry = ""
+	tmp = []
+	length = 0
+	for piece in pieces:
+		tmp.append(piece)
+		length += len(piece)
+		if length >= size:
+			text = carry + ("").join(tmp)
+			tmp = []
+			length = 0
+			end = text.rfind("\n") + 1
+			if end <= overlap:
+				end = len(text)
+			start = text.rfind("\n", 0, end - overlap) + 1 or end - overlap
+			yield Chunk(text[:end], base, start)
+			base += start
+			carry = text[start:]
+	text = carry + ("").join(tmp)
+	if text:
+		yield Chunk(text, base, len(text))
@@ -7,6 +7,122 @@ EXCLUDES = ["car", "css", "gif", "jpeg", "jpg", "mp3", "mp4", "nib", "ogg", "otf
 List of file extensions.
 """
 
+TEXTS = ["cfg", "conf", "config", "csv", "env", "gradle", "html", "ini", "java", "js", "json", "jsx", "kt", "m", "md", "plist", "properties", "py", "sh", "smali", "swift", "ts", "tsx", "txt", "xml", "yaml", "yml"]
+"""
+List of file extensions that are most likely text files, i.e., their content is read directly instead of extracting strings.\n
+The content is still sampled, e.g., to detect binary property lists.
+"""
+
+BINARIES = ["a", "apk", "bin", "dex", "dll", "dylib", "elf", "exe", "ipa", "jar", "o", "oat", "odex", "so", "vdex", "zip"]
+"""
+List of file extensions that are always binary files, i.e., their content is never sampled.
+"""
+
+SAMPLE_SIZE = 8192
+"""
+Number of bytes to sample from the beginning of a file to decide whether it is a text file.
+"""
+
+QUEUE_SIZE_PER_WORKER = 2
+"""
+Number of files per worker that can be submitted but not yet scraped, i.e., the walker waits for the workers beyond that.
+"""
+
+QUEUE_LOOKAHEAD_PER_WORKER = 16
+"""
+Number of files per worker that are found but not yet submitted, i.e., the largest file is submitted first only within that window.
+"""
+
+JOURNAL_SYNC_INTERVAL = 100
+"""
+Number of files after which the journal is synced to disk, i.e., at most that many files are scraped again after a crash.
+"""
+
+REPORT_CHUNK_SIZE = 100
+"""
+Number of files per JSON chunk of a paginated report page, i.e., per lazily rendered block.
+"""
+
+CHUNK_SIZE = 16 * 1024 * 1024
+"""
+Number of characters to scan at a time, i.e., larger files are scanned in chunks, so the memory used per file is bounded.
+"""
+
+CHUNK_OVERLAP = 256 * 1024
+"""
+Number of characters by which the consecutive chunks overlap, i.e., the maximum length of a match that is guaranteed not to be split.
+"""
+
+MINIMUM_STRING_LENGTH = 4
+"""
+Minimum length of a string extracted by the native extractor.
+"""
+
+MAXIMUM_STRING_LENGTH = 64 * 1024
+"""
+Maximum length of a single piece of a string extracted by the native extractor, i.e., longer strings are extracted in pieces of that length.
+"""
+
+BEAUTIFY_SIZE = 8 * 1024 * 1024
+"""
+Default maximum size of a JavaScript (.js) file to beautify, i.e., larger files are scraped as is.
+"""
+
+MINIFIED_LINE_LENGTH = 500
+"""
+Average line length from which a JavaScript (.js) file is considered minified, i.e., files with shorter lines are not beautified.
+"""
+
+STATS_TOP = 10
+"""
+Number of the slowest template entries and files to show in the statistics.
+"""
+
+DECODE_CACHE_SIZE = 4096
+"""
+Maximum number of decoded values to cache per worker, i.e., the same value found in many files is decoded only once.
+"""
+
+ENTRY_TIMEOUT = 60
+"""
+Default maximum number of seconds a template entry can spend matching a single chunk of a file, i.e., an entry that backtracks catastrophically is stopped.
+"""
+
+LINE_TIMEOUT = 1
+"""
+Maximum number of seconds a timed-out template entry can spend matching a single line when retried line by line.
+"""
+
+ZIP_ARCHIVES = ["aab", "aar", "apk", "apks", "ear", "ipa", "jar", "war", "xapk", "zip"]
+"""
+List of file extensions of ZIP-based archives, e.g., application packages, which are opened if archive scanning is enabled.
+"""
+
+TAR_ARCHIVES = ["tar", "tar.gz", "tgz", "tar.bz2", "tbz2", "tar.xz", "txz"]
+"""
+List of file extensions of tar archives, which are opened if archive scanning is enabled.
+"""
+
+ARCHIVE_DEPTH = 3
+"""
+Default maximum depth of nested archives to open, e.g., '1' opens only the archives found in the directory.
+"""
+
+ARCHIVE_CACHE_SIZE = 8
+"""
+Number of archives to keep open per process, i.e., the members of the same archive are read without opening the archive again.
+"""
+
+ARCHIVE_SPOOL_SIZE = 32 * 1024 * 1024
+"""
+Number of bytes of a nested or compressed archive, or of a member scraped as a binary file, to keep in memory, i.e., larger ones are spooled to a temporary file.
+"""
+
+RABIN2_LIMIT = 0
+"""
+Maximum number of Rabin2 subprocesses to run at a time per process, zero for one per CPU, i.e., the other files wait for a free slot.
+"""
+
 def banner():
 	"""
 	Display the banner.
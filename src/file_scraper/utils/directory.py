@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 
-from . import array, file
+from . import archive
 
-import os
+import concurrent.futures, dataclasses, hashlib, heapq, os, typing
+
+@dataclasses.dataclass
+class File:
+	"""
+	Class for storing a single file found in a directory, and its status.\n
+	An archive's member has a virtual path, e.g., 'app.apk!/classes.dex', and the archive's status with the member's uncompressed size.
+	"""
+	path: str
+	stat: os.stat_result
 
 def exists(path: str):
 	"""
@@ -16,6 +25,12 @@ def is_directory(directory: str):
 	"""
 	return os.path.isdir(directory)
 
+def create(directory: str):
+	"""
+	Create a directory, including all its parent directories, if it does not exist.
+	"""
+	os.makedirs(directory, exist_ok = True)
+
 def validate(directory: str):
 	"""
 	Validate a directory.\n
@@ -31,31 +46,135 @@ def validate(directory: str):
 		success = True
 	return success, message
 
-def list_files(directory: str) -> list[str]:
+def get_file(path: str):
 	"""
-	Get all valid files from a directory. Recursive.
+	Get a single file, and its status.
 	"""
-	tmp = []
-	for path, dirnames, filenames in os.walk(directory):
-		for filename in filenames:
-			full = os.path.join(path, filename)
-			if file.validate_silent(full):
-				tmp.append(full)
-	return array.unique(tmp)
+	return File(path, os.stat(path))
 
-def filter_files(files: list[str], blacklist: list[str] = None, whitelist: list[str] = None):
+def walk(directory: str, blacklist: list[str] = None, whitelist: list[str] = None, threads: int = 1, depth: int = 0) -> typing.Iterator[File]:
 	"""
-	Filter out files based on the specified blacklist and whitelist.
+	Get all valid files from a directory, one by one, filtered based on the specified blacklist and whitelist. Recursive.\n
+	Valid files are regular files that are not empty. The status of each file is retrieved only after it passes the filters.\n
+	If more than one thread is specified, subdirectories are scanned in parallel, and the order of files is not preserved.\n
+	If the depth is specified, archives are replaced by their members, see 'expand()'.
 	"""
-	tmp = []
-	if whitelist:
-		for file in files:
-			if any(file.endswith(ext) for ext in whitelist):
-				tmp.append(file)
-	elif blacklist:
-		for file in files:
-			if not any(file.endswith(ext) for ext in blacklist):
-				tmp.append(file)
+	suffixes = __Suffixes(whitelist or blacklist)
+	accept = bool(whitelist)
+	if threads > 1:
+		yield from __walk_parallel(directory, suffixes, accept, depth, threads)
 	else:
-		tmp = files
+		stack = [directory]
+		while stack:
+			files, subdirectories = __scan(stack.pop(), suffixes, accept, depth)
+			yield from files
+			stack.extend(reversed(subdirectories))
+
+def expand(file: File, depth: int, blacklist: list[str] = None, whitelist: list[str] = None) -> typing.Iterator[File]:
+	"""
+	Get all valid members of an archive, one by one, filtered based on the specified blacklist and whitelist, opening the nested archives up to the specified depth.\n
+	Archives are filtered by their members' names, i.e., not by their own, and are never extracted to disk.\n
+	An archive that cannot be opened, and a file that is not an archive, are returned as is, if they pass the filters.
+	"""
+	yield from __expand(file, __Suffixes(whitelist or blacklist), bool(whitelist), depth)
+
+def shard(files: typing.Iterable[File], index: int, count: int) -> list[File]:
+	"""
+	Get the files of a single shard, out of the specified number of shards, where the index starts from zero.\n
+	Files are assigned to the least loaded shard, from the largest to the smallest, with ties broken by path hash, so the shards are balanced by total size.\n
+	The partition is deterministic, i.e., it is the same on every node, as long as each node finds the same files at the same paths.\n
+	Returns the files from the largest to the smallest.
+	"""
+	tmp = []
+	loads = [(0, i) for i in range(count)]
+	for entry in sorted(files, key = lambda entry: (-entry.stat.st_size, hashlib.sha256(entry.path.encode(errors = "surrogateescape")).hexdigest())):
+		load, i = heapq.heappop(loads)
+		if i == index:
+			tmp.append(entry)
+		heapq.heappush(loads, (load + entry.stat.st_size, i))
 	return tmp
+
+def __walk_parallel(directory: str, suffixes: "__Suffixes", accept: bool, depth: int, threads: int) -> typing.Iterator[File]:
+	"""
+	Get all valid files from a directory, one by one, scanning the subdirectories in parallel. Recursive.
+	"""
+	with concurrent.futures.ThreadPoolExecutor(max_workers = threads) as executor:
+		pending = {executor.submit(__scan, directory, suffixes, accept, depth)}
+		while pending:
+			done, pending = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				files, subdirectories = future.result()
+				for subdirectory in subdirectories:
+					pending.add(executor.submit(__scan, subdirectory, suffixes, accept, depth))
+				yield from files
+
+def __scan(directory: str, suffixes: "__Suffixes", accept: bool, depth: int = 0) -> tuple[list[File], list[str]]:
+	"""
+	Get all valid files and all subdirectories from a directory. Not recursive.\n
+	If the depth is specified, archives are replaced by their members.\n
+	Unreadable directories are silently skipped.
+	"""
+	files = []
+	subdirectories = []
+	try:
+		with os.scandir(directory) as entries:
+			for entry in entries:
+				try:
+					if entry.is_dir(follow_symlinks = False):
+						subdirectories.append(entry.path)
+					elif depth and archive.is_archive(entry.path) and entry.is_file():
+						stat = entry.stat()
+						if stat.st_size > 0:
+							files.extend(__expand(File(entry.path, stat), suffixes, accept, depth))
+					elif (not suffixes or suffixes.match(entry.path) == accept) and entry.is_file():
+						stat = entry.stat()
+						if stat.st_size > 0:
+							files.append(File(entry.path, stat))
+				except OSError:
+					pass
+	except OSError:
+		pass
+	return files, subdirectories
+
+def __expand(file: File, suffixes: "__Suffixes", accept: bool, depth: int) -> typing.Iterator[File]:
+	"""
+	Get all valid members of an archive, one by one, opening the nested archives up to the specified depth. Recursive.
+	"""
+	members = None
+	if depth > 0 and archive.is_archive(file.path):
+		try:
+			members = archive.get_members(file.path)
+		except Exception:
+			pass
+	if members is None:
+		if not suffixes or suffixes.match(file.path) == accept:
+			yield file
+		return
+	for name, size in members:
+		yield from __expand(File(f"{file.path}{archive.SEPARATOR}{name}", __get_stat(file.stat, size)), suffixes, accept, depth - 1)
+
+def __get_stat(stat: os.stat_result, size: int):
+	"""
+	Get a copy of a file's status with a different size.
+	"""
+	tmp = list(stat)
+	tmp[6] = size
+	return os.stat_result(tmp, {name: getattr(stat, name) for name in ["st_atime", "st_mtime", "st_ctime", "st_atime_ns", "st_mtime_ns", "st_ctime_ns"]})
+
+class __Suffixes:
+
+	def __init__(self, suffixes: list[str] = None):
+		"""
+		Class for matching the end of a path against many suffixes, with one set lookup per distinct suffix length.
+		"""
+		self.__suffixes = set(suffixes or [])
+		self.__lengths  = sorted(set(len(suffix) for suffix in self.__suffixes))
+
+	def __bool__(self):
+		return bool(self.__suffixes)
+
+	def match(self, path: str):
+		"""
+		Returns 'True' if the path ends with any of the suffixes.
+		"""
+		return any(path[-length:] in self.__suffixes for length in self.__lengths if length <= len(path))
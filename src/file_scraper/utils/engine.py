@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+
+from . import archive, array, cache, chunk, config, extract, file, grep, prefilter, rabin, result, stats, string, template
+
+import signal, time, typing
+
+class Engine:
+
+	def __init__(
+		self,
+		template  : template.Template,
+		extractor : extract.Extractor,
+		cache     : cache.Cache | None = None,
+		hashing   : bool               = False,
+		statistics: bool               = False,
+		timeout   : float              = 0,
+		retry     : bool               = False
+	):
+		"""
+		Class for scraping a single file.\n
+		The class can be pickled, i.e., it can be sent to worker processes.\n
+		If statistics are enabled, the time spent in each stage and in each template entry is recorded in 'FileResults.statistics'.\n
+		Each template entry has its own time budget per chunk, and if the timeout is specified, each file also has a time budget in seconds.\n
+		If retrying is enabled, the template entries that time out and cannot match across multiple lines are run again line by line.
+		"""
+		self.__template  = template
+		self.__prefilter = prefilter.Prefilter(template)
+		self.__extractor = extractor
+		self.__stream    = rabin.stream if extractor == extract.Extractor.RABIN2 else extract.stream
+		self.__cache     = cache
+		self.__hashing   = hashing
+		self.__statistics = statistics
+		self.__timeout    = timeout
+		self.__retry      = retry
+		self.__line_bound = {key for key, entry in template.entries.items() if grep.is_line_bound(entry.search or entry.query)}
+		self.__fingerprints = {key: entry.get_fingerprint() for key, entry in template.entries.items()}
+
+	def run(self, path: str, digest: str = "", segment: tuple[int, int] | None = None, source: str = ""):
+		"""
+		Returns searches with highlighted matches or exact matches.\n
+		If the file's content hash is equal to the specified one, the file is not scraped, and 'FileResults.unchanged' is set.\n
+		If the cache is enabled, only the template entries without cached results for the file's content are run.\n
+		If a '(start, end)' segment of a text file is specified, only the matches starting within the segment are returned, and the cache is not used.\n
+		If a source is specified, e.g., a beautified copy of the file, the source is scraped instead, and its results are cached by the file's content hash.\n
+		Errors are stored in 'FileResults.errors' instead of being printed, and the template entries that time out are stored in 'FileResults.timeouts'; their results are not cached.
+		"""
+		results = result.FileResults(path, statistics = stats.FileStats() if self.__statistics else None)
+		with stats.measure(results.statistics and results.statistics.timing):
+			self.__run(results, digest, segment, source)
+		if results.statistics:
+			results.statistics.timing.bytes = segment[1] - segment[0] if segment else archive.get_size(path)
+		return results
+
+	def __run(self, results: result.FileResults, digest: str, segment: tuple[int, int] | None, source: str):
+		"""
+		Scrape a single file, or a single segment of a file, and store its results.
+		"""
+		path = results.file
+		deadline = time.perf_counter() + self.__timeout if self.__timeout > 0 else 0
+		try:
+			if segment:
+				start, end = segment
+				self.__scan(stats.iterate(file.stream(path, start = start, end = end + config.CHUNK_OVERLAP), self.__get_stage(results, "read")), set(self.__template.entries.keys()), results, deadline, start, end - start)
+				return
+			if self.__cache or self.__hashing or digest:
+				with stats.measure(self.__get_stage(results, "hash"), archive.get_size(path) if results.statistics else 0):
+					results.digest = file.get_hash(path)
+				if results.digest == digest:
+					results.unchanged = True
+					return
+			source = source or path
+			is_text = file.is_text(source)
+			keys = set(self.__template.entries.keys())
+			if self.__cache:
+				backend = f"{'beautified' if source != path else 'text' if is_text else self.__extractor.value}:{config.APP_VERSION}"
+				with stats.measure(self.__get_stage(results, "cache")):
+					cached = self.__cache.get(results.digest, self.__fingerprints, backend)
+				keys -= cached.keys()
+			if keys:
+				self.__scan(stats.iterate(file.stream(source) if is_text else self.__stream(source), self.__get_stage(results, "read" if is_text else "extract")), keys, results, deadline)
+			if self.__cache:
+				if not results.errors:
+					with stats.measure(self.__get_stage(results, "cache")):
+						self.__cache.set(results.digest, {key: self.__fingerprints[key] for key in keys if key not in results.timeouts}, backend, results.results)
+				results.results.update(cached)
+				results.results = {key: results.results[key] for key in self.__template.entries if results.results.get(key)}
+		except Exception as ex:
+			results.errors.append(str(ex))
+
+	def __get_stage(self, results: result.FileResults, name: str):
+		"""
+		Get the timing of a stage, or 'None' if statistics are disabled.
+		"""
+		return results.statistics.get_stage(name) if results.statistics else None
+
+	def __scan(self, pieces: typing.Iterable[str], keys: set[str], results: result.FileResults, deadline: float = 0, base: int = 0, limit: int = -1):
+		"""
+		Run the specified template entries on a text stream.\n
+		The text is scanned in overlapping chunks, so the memory used per file is bounded regardless of its size.\n
+		The base is the offset of the text stream, and if the limit is specified, only the matches starting before it are returned.\n
+		If the file's deadline passes, scanning stops, and all the specified template entries are marked as timed out.
+		"""
+		consumed: dict[str, int] = {}
+		seen: dict[str, set] = {}
+		try:
+			for part in chunk.split(pieces, config.CHUNK_SIZE, config.CHUNK_OVERLAP):
+				owned = part.owned
+				if limit >= 0:
+					if part.base >= limit:
+						break
+					owned = min(owned, limit - part.base)
+				with stats.measure(self.__get_stage(results, "prefilter"), len(part.text)):
+					candidates = self.__prefilter.scan(part.text)
+				for key, spans in candidates.items():
+					if key not in keys:
+						continue
+					entry = self.__template.entries[key]
+					counter = results.statistics.get_entry(key) if results.statistics else None
+					start = consumed.get(key, 0) - part.base
+					with stats.measure(counter and counter.timing, sum(end - start for start, end in spans)):
+						try:
+							tmp, last, error = self.__find(part.text, entry, spans, start, owned, base + part.base, seen.setdefault(key, set()), self.__get_deadline(entry.timeout or config.ENTRY_TIMEOUT, deadline), results.statistics, counter)
+						except TimeoutError:
+							tmp, last, error = self.__find_lines(part.text, key, entry, spans, start, owned, base + part.base, seen[key], deadline, results, counter)
+					if error:
+						results.errors.append(error)
+						continue
+					if last >= 0:
+						consumed[key] = part.base + last
+					if tmp:
+						results.results.setdefault(key, []).extend(tmp)
+						if counter:
+							counter.matches += len(tmp)
+		except TimeoutError:
+			for key in self.__template.entries:
+				if key in keys:
+					self.__add_timeout(results, key)
+
+	def __get_deadline(self, timeout: float, deadline: float):
+		"""
+		Get the deadline of a time budget starting now, but no later than the file's deadline, if specified.
+		"""
+		tmp = time.perf_counter() + timeout
+		return min(tmp, deadline) if deadline else tmp
+
+	def __add_timeout(self, results: result.FileResults, key: str):
+		"""
+		Mark a template entry as timed out, once per file.
+		"""
+		if key not in results.timeouts:
+			results.timeouts.append(key)
+			if results.statistics:
+				results.statistics.get_entry(key).timeouts += 1
+
+	def __find(self, text: str, entry: template.TemplateEntry, spans: list[tuple[int, int]], start: int, end: int, offset: int, seen: set, deadline: float, statistics: stats.FileStats | None, counter: stats.EntryStats | None) -> tuple[list[result.Result], int, str]:
+		"""
+		Run a template entry on the specified '(start, end)' spans of a chunk's text, starting at the 'start' position, and only for the matches starting before the 'end' position.\n
+		The offset is the position of the chunk in the scraped text.\n
+		Returns the results, the end of the last match or '-1' if there are none, and an error message on failure.\n
+		Raises 'TimeoutError' once the deadline passes, in which case the seen values are not updated.
+		"""
+		matches, error = grep.find_matches(text, entry.matcher.search or entry.matcher.query, spans, start, end, deadline)
+		if error or not matches:
+			return [], -1, error
+		values = [(offset + value_offset, value) for match_start, match_end, value, value_offset in matches]
+		added = set()
+		if entry.unique:
+			values = self.__get_unique(values, seen, added)
+		tmp = self.__search(values, entry, deadline, statistics, counter) if entry.search else self.__match(values, entry, statistics, counter)
+		seen.update(added)
+		return tmp, matches[-1][1], ""
+
+	def __find_lines(self, text: str, key: str, entry: template.TemplateEntry, spans: list[tuple[int, int]], start: int, end: int, offset: int, seen: set, deadline: float, results: result.FileResults, counter: stats.EntryStats | None) -> tuple[list[result.Result], int, str]:
+		"""
+		Run a template entry that timed out again, line by line, if retrying is enabled and the entry cannot match across multiple lines.\n
+		Each line has its own time budget, and the lines that time out again are skipped.\n
+		If any line is skipped, or if the entry is not run again, the entry is marked as timed out.\n
+		Raises 'TimeoutError' once the file's deadline passes.
+		"""
+		if deadline and time.perf_counter() >= deadline:
+			raise TimeoutError()
+		tmp = []
+		last = -1
+		skipped = not (self.__retry and key in self.__line_bound)
+		if not skipped:
+			for line in self.__get_lines(text, spans, start, end):
+				try:
+					found, found_last, error = self.__find(text, entry, [line], start, end, offset, seen, self.__get_deadline(config.LINE_TIMEOUT, deadline), results.statistics, counter)
+				except TimeoutError:
+					if deadline and time.perf_counter() >= deadline:
+						raise
+					skipped = True
+					continue
+				if error:
+					return tmp, last, error
+				tmp.extend(found)
+				last = max(last, found_last)
+		if skipped:
+			self.__add_timeout(results, key)
+		return tmp, last, ""
+
+	def __get_lines(self, text: str, spans: list[tuple[int, int]], start: int, end: int) -> typing.Iterator[tuple[int, int]]:
+		"""
+		Get the '(start, end)' positions of the lines within the specified spans of a text, including the line breaks, starting at the 'start' position, and only for the lines starting before the 'end' position.
+		"""
+		for span_start, span_end in spans:
+			position = max(span_start, start)
+			while position < span_end and (end < 0 or position < end):
+				line_end = text.find("\n", position, span_end)
+				line_end = span_end if line_end < 0 else line_end + 1
+				yield position, line_end
+				position = line_end
+
+	def merge(self, segments: list[result.FileResults]):
+		"""
+		Merge the results and the statistics of a file's segments, in the segments' order.\n
+		Duplicates found in different segments are removed for the template entries with unique results.
+		"""
+		tmp = result.FileResults(segments[0].file)
+		seen: dict[str, set] = {}
+		for segment in segments:
+			tmp.errors.extend(segment.errors)
+			tmp.timeouts.extend(key for key in segment.timeouts if key not in tmp.timeouts)
+			if segment.statistics:
+				tmp.statistics = tmp.statistics or stats.FileStats()
+				tmp.statistics.add(segment.statistics)
+			for key, values in segment.results.items():
+				if self.__template.entries[key].unique:
+					exists = seen.setdefault(key, set())
+					values = [value for value in values if not (value.text in exists or exists.add(value.text))]
+				tmp.results.setdefault(key, []).extend(values)
+		tmp.results = {key: tmp.results[key] for key in self.__template.entries if tmp.results.get(key)}
+		tmp.timeouts = [key for key in self.__template.entries if key in tmp.timeouts]
+		if tmp.statistics:
+			for key, counter in tmp.statistics.entries.items():
+				counter.matches = len(tmp.results.get(key, []))
+				counter.timeouts = int(key in tmp.timeouts)
+		return tmp
+
+	def __get_unique(self, values: list[tuple[int, str]], seen: set, added: set):
+		"""
+		Remove duplicates from a list of '(offset, value)' tuples, including the values seen in the previous chunks.\n
+		The values seen for the first time are added to the 'added' set, not to the 'seen' set.
+		"""
+		return [(offset, value) for offset, value in values if not (value in seen or value in added or added.add(value))]
+
+	def __get_result(self, offset: int, text: str):
+		"""
+		Get a result with the whitespace stripped from its text.
+		"""
+		stripped = text.strip()
+		return result.Result(stripped, offset + len(text) - len(text.lstrip()) if stripped else offset)
+
+	def __get_spans(self, text: str, matches: list[str]) -> tuple[tuple[int, int], ...]:
+		"""
+		Get the sorted, non-overlapping '(start, end)' positions of all the occurrences of the matches within a text.
+		"""
+		spans = []
+		for matched in matches:
+			start = text.find(matched)
+			while matched and start >= 0:
+				spans.append((start, start + len(matched)))
+				start = text.find(matched, start + len(matched))
+		tmp = []
+		for start, end in sorted(spans):
+			if not tmp or start >= tmp[-1][1]:
+				tmp.append((start, end))
+		return tuple(tmp)
+
+	def __decode(self, matched: str, entry: template.TemplateEntry, statistics: stats.FileStats | None, counter: stats.EntryStats | None):
+		"""
+		Decode a match, and count the attempt and, if successful, the decoded value.
+		"""
+		if not statistics:
+			return string.decode(matched, entry.decode)
+		with stats.measure(statistics.get_stage("decode"), len(matched)):
+			decoded = string.decode(matched, entry.decode)
+		counter.attempts += 1
+		counter.decoded += bool(decoded)
+		return decoded
+
+	def __search(self, searches: list[tuple[int, str]], entry: template.TemplateEntry, deadline: float = 0, statistics: stats.FileStats | None = None, counter: stats.EntryStats | None = None) -> list[result.Result]:
+		"""
+		Returns searches with the positions of their matches.\n
+		Raises 'TimeoutError' once the deadline passes, if specified.
+		"""
+		results = []
+		for offset, searched in searches:
+			tmp = self.__get_result(offset, searched)
+			highlights = []
+			decoded_values = []
+			success = False
+			for matched in array.unique(entry.matcher.query.findall(tmp.text, timeout = grep.get_timeout(deadline))):
+				if not string.is_length_valid(matched, entry.minimum, entry.maximum):
+					continue
+				success = True
+				if entry.decode != template.Encoding.NONE:
+					decoded = self.__decode(matched, entry, statistics, counter)
+					if not decoded or not string.is_length_valid(decoded, entry.minimum_decode, entry.maximum_decode):
+						continue
+					decoded_values.append(decoded)
+				highlights.append(matched)
+			if success:
+				tmp.spans = self.__get_spans(tmp.text, highlights)
+				tmp.decoded = tuple(decoded_values)
+				results.append(tmp)
+		return results
+
+	def __match(self, matches: list[tuple[int, str]], entry: template.TemplateEntry, statistics: stats.FileStats | None = None, counter: stats.EntryStats | None = None) -> list[result.Result]:
+		"""
+		Returns exact matches.
+		"""
+		results = []
+		for offset, matched in matches:
+			if not string.is_length_valid(matched, entry.minimum, entry.maximum):
+				continue
+			tmp = self.__get_result(offset, matched)
+			if entry.decode != template.Encoding.NONE:
+				decoded = self.__decode(matched, entry, statistics, counter)
+				if not decoded or not string.is_length_valid(decoded, entry.minimum_decode, entry.maximum_decode):
+					continue
+				tmp.decoded = (decoded,)
+			results.append(tmp)
+		return results
+
+# ----------------------------------------
+
+__engine: Engine = None
+
+def init_worker(engine: Engine):
+	"""
+	Initialize a worker process with an engine, once per process.\n
+	The worker process ignores CTRL + C, which is handled by the main process.
+	"""
+	global __engine
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	__engine = engine
+
+def run_worker(path: str, digest: str = "", segment: tuple[int, int] | None = None, source: str = ""):
+	"""
+	Scrape a single file, or a single segment of a file, in a worker process.
+	"""
+	return __engine.run(path, digest, segment, source)
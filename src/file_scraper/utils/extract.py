@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+from . import archive, config
+
+import enum, re, typing
+
+__ENCODING = "ISO-8859-1"
+
+class Extractor(str, enum.Enum):
+	"""
+	Enum containing string extraction backends.
+	"""
+	NATIVE = "native"
+	RABIN2 = "rabin2"
+
+__PRINTABLE = rb"[\x20-\x7e\t\n\r]"
+
+__STRINGS = re.compile(rb"(?:%s\x00){%d,%d}|%s{%d,%d}" % (__PRINTABLE, config.MINIMUM_STRING_LENGTH, config.MAXIMUM_STRING_LENGTH, __PRINTABLE, config.MINIMUM_STRING_LENGTH, config.MAXIMUM_STRING_LENGTH))
+
+__CONTINUATIONS = {
+	False: re.compile(rb"%s{1,%d}" % (__PRINTABLE, config.MAXIMUM_STRING_LENGTH)),
+	True : re.compile(rb"(?:%s\x00){1,%d}" % (__PRINTABLE, config.MAXIMUM_STRING_LENGTH))
+}
+
+def stream(file: str) -> typing.Iterator[str]:
+	"""
+	Extract all printable ASCII and UTF-16LE strings from a file, or an archive's member, one by one, each but the first one prefixed with a new line.\n
+	A string longer than the maximum string length is extracted in pieces of that length, without new lines in between, so a single match never grows with the string.\n
+	The file is memory-mapped, so it is never read into memory as a whole; see 'archive.get_buffer()' for the members.
+	"""
+	with archive.get_buffer(file) as data:
+		separator = ""
+		position = 0
+		while match := __STRINGS.search(data, position):
+			yield separator + decode(match.group())
+			separator = "\n"
+			position = match.end()
+			wide = match.group()[1] == 0
+			while len(match.group()) == config.MAXIMUM_STRING_LENGTH * (2 if wide else 1) and (match := __CONTINUATIONS[wide].match(data, position)):
+				yield decode(match.group())
+				position = match.end()
+
+def decode(string: bytes):
+	"""
+	Decode an extracted ASCII or UTF-16LE string.
+	"""
+	return string.decode("UTF-16LE") if len(string) > 1 and string[1] == 0 else string.decode(__ENCODING)
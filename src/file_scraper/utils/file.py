@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 
-import jsbeautifier, os
+from . import archive, config
+
+import hashlib, io, jsbeautifier, os, typing
 
 __ENCODING = "ISO-8859-1"
 
+__CONTROL = bytes(range(32)).replace(b"\b", b"").replace(b"\t", b"").replace(b"\n", b"").replace(b"\f", b"").replace(b"\r", b"") + b"\x7f"
+
 def __get_root_directory(subdirectory: str = ""):
 	"""
 	Get the full path to the installation directory.
@@ -17,11 +21,11 @@ def get_template():
 	"""
 	return os.path.join(__get_root_directory("templates"), "default.json")
 
-def get_report():
+def get_report(name: str = "default"):
 	"""
-	Get the full path to the default report template.
+	Get the full path to a built-in report template, by default, to the default one.
 	"""
-	return os.path.join(__get_root_directory("reports"), "default.html")
+	return os.path.join(__get_root_directory("reports"), f"{name}.html")
 
 def get_font():
 	"""
@@ -52,12 +56,15 @@ def validate(file: str):
 		success = True
 	return success, message
 
-def validate_silent(file: str):
+def get_hash(file: str, size: int = 1024 * 1024, algorithm: str = "sha256"):
 	"""
-	Silently validate a file.\n
-	Returns 'True' if the 'file' exists, is a regular file, has a read permission, and is not empty.
+	Get the hash of a file's content, or of an archive's member, by default, SHA-256, reading the file in blocks of the specified size.
 	"""
-	return os.path.isfile(file) and os.access(file, os.R_OK) and os.stat(file).st_size > 0
+	digest = hashlib.new(algorithm)
+	with archive.open(file) as stream:
+		for block in iter(lambda: stream.read(size), b""):
+			digest.update(block)
+	return digest.hexdigest()
 
 def read(file: str):
 	"""
@@ -66,29 +73,126 @@ def read(file: str):
 	"""
 	return open(file, "r", encoding = __ENCODING).read().strip()
 
-def overwrite(text: str, out: str):
+def get_extension(file: str):
 	"""
-	Write a text to an output file.\n
-	If the output file exists, prompt to overwrite it.
+	Get the lowercased file extension without the leading dot.
+	"""
+	return os.path.splitext(file)[1][1:].lower()
+
+def is_text(file: str):
+	"""
+	Returns 'True' if a file, or an archive's member, is most likely a text file, based on its extension and a small sample of its content.\n
+	Returns 'False' on failure.
+	"""
+	success = False
+	extension = get_extension(file)
+	if extension not in config.BINARIES:
+		try:
+			with archive.open(file) as stream:
+				sample = stream.read(config.SAMPLE_SIZE)
+			if b"\x00" not in sample:
+				success = extension in config.TEXTS or len(sample.translate(None, __CONTROL)) >= len(sample) * 0.9
+		except Exception:
+			pass
+	return success
+
+def read_text(file: str):
+	"""
+	Read a file, or an archive's member, as text, as is, i.e., new lines are not translated.\n
+	Returns an empty string and an error message on failure.
+	"""
+	text = ""
+	message = ""
+	try:
+		with archive.open(file) as stream:
+			text = io.TextIOWrapper(stream, encoding = __ENCODING, newline = "").read()
+	except Exception as ex:
+		message = str(ex)
+	return text, message
+
+def stream(file: str, size: int = 1024 * 1024, start: int = 0, end: int = -1) -> typing.Iterator[str]:
+	"""
+	Read a file, or an archive's member, as text, as is, in pieces of the specified size.\n
+	New lines are not translated, so the positions in the text are the byte positions in the file.\n
+	If a start or an end byte position is specified, only that part of the file is read.
+	"""
+	if not start and end < 0:
+		with archive.open(file) as stream:
+			stream = io.TextIOWrapper(stream, encoding = __ENCODING, newline = "")
+			for piece in iter(lambda: stream.read(size), ""):
+				yield piece
+		return
+	with open(file, "rb") as stream:
+		stream.seek(start)
+		remaining = end - start if end >= 0 else -1
+		while remaining:
+			piece = stream.read(size if remaining < 0 else min(size, remaining))
+			if not piece:
+				break
+			remaining -= len(piece) if remaining > 0 else 0
+			yield piece.decode(__ENCODING)
+
+def get_segments(file: str, size: int, segment_size: int, block: int = 64 * 1024) -> list[tuple[int, int]]:
+	"""
+	Split a file into '(start, end)' byte segments of approximately the specified size, each but the first starting on a new line.
+	"""
+	tmp = []
+	start = 0
+	with open(file, "rb") as stream:
+		while start < size:
+			end = start + segment_size
+			if end < size:
+				stream.seek(end)
+				while data := stream.read(block):
+					index = data.find(b"\n")
+					if index >= 0:
+						end += index + 1
+						break
+					end += len(data)
+			end = min(end, size)
+			tmp.append((start, end))
+			start = end
+	return tmp
+
+def confirm_overwrite(out: str):
+	"""
+	If the output file exists, prompt to overwrite it.\n
+	Returns 'True' if the output file does not exist or can be overwritten.
 	"""
 	confirm = "yes"
 	if os.path.isfile(out):
 		print(f"'{out}' already exists")
 		confirm = input("Overwrite the output file (yes): ")
-	if confirm.lower() in ["yes", "y"]:
+	return confirm.lower() in ["yes", "y"]
+
+def overwrite(text: str, out: str):
+	"""
+	Write a text to an output file.\n
+	If the output file exists, prompt to overwrite it.
+	"""
+	if confirm_overwrite(out):
 		try:
 			open(out, "w", errors = "ignore").write(text)
 			print(f"Results have been saved to '{out}'")
 		except FileNotFoundError:
 			print(f"Cannot save the results to '{out}'")
 
-def beautify(file: str):
+def beautify(text: str, out: str):
 	"""
-	Beautify a JavaScript (.js) file.
+	Beautify a JavaScript (.js) text, and write it to an output file.\n
+	The output file is replaced atomically, so it is never partially written.\n
+	Returns 'False' on failure.
 	"""
+	success = False
+	tmp = f"{out}.{os.getpid()}.tmp"
 	try:
-		text = jsbeautifier.beautify_file(file)
+		text = jsbeautifier.beautify(text)
 		if text:
-			open(file, "w").write(text)
+			with open(tmp, "w", encoding = __ENCODING) as stream:
+				stream.write(text)
+			os.replace(tmp, out)
+			success = True
 	except Exception:
-		pass
+		if os.path.isfile(tmp):
+			os.remove(tmp)
+	return success
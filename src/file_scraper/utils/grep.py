@@ -1,6 +1,35 @@
 #!/usr/bin/env python3
 
-import regex as re
+import dataclasses, regex as re, time
+
+@dataclasses.dataclass
+class Matcher:
+	"""
+	Class for storing a precompiled RegEx pattern, its search pattern, and flags.
+	"""
+	query : re.Pattern
+	search: re.Pattern | None = None
+	flags : int               = 0
+
+def get_flags(ignorecase: bool = True):
+	"""
+	Get the RegEx flags used for all the matching.
+	"""
+	return re.MULTILINE | (re.IGNORECASE if ignorecase else 0)
+
+def compile_matcher(query: str, search: str = "", ignorecase: bool = True) -> tuple[Matcher | None, str]:
+	"""
+	Compile a RegEx pattern and, if specified, its search pattern once, so they can be reused on every file.\n
+	Returns 'None' and an error message on failure.
+	"""
+	matcher = None
+	message = ""
+	try:
+		flags = get_flags(ignorecase)
+		matcher = Matcher(re.compile(query, flags), re.compile(search, flags) if search else None, flags)
+	except re.error as ex:
+		message = f"Invalid RegEx: {query} ({ex})"
+	return matcher, message
 
 def validate(query: str):
 	"""
@@ -15,19 +44,53 @@ def validate(query: str):
 		message = f"Invalid RegEx: {query}"
 	return success, message
 
-def find(text: str, query: str, ignorecase: bool = True) -> tuple[list, str]:
+def find_matches(text: str, query: re.Pattern, spans: list[tuple[int, int]] = None, start: int = 0, end: int = -1, deadline: float = 0) -> tuple[list[tuple[int, int, str, int]], str]:
 	"""
-	Extract all matches from a text using the specified RegEx pattern.\n
+	Extract all matches with their '(start, end, value, offset)' positions from a text using the specified precompiled RegEx pattern.\n
+	The extracted values are the same as the values extracted with 'findall()', i.e., the first capturing group if there is one, and the offset is the position of the value.\n
+	If spans are specified, only those '(start, end)' regions of the text are searched, in order.\n
+	Searching starts at the 'start' position, and only matches starting before the 'end' position are extracted, if specified.\n
+	If a deadline is specified, i.e., a 'time.perf_counter()' value, it applies to all the spans together, and 'TimeoutError' is raised once it passes.\n
 	Returns an empty list and an error message on failure.
 	"""
 	tmp = []
 	message = ""
 	try:
-		tmp = re.findall(query, text, flags = re.MULTILINE | (re.IGNORECASE if ignorecase else 0))
+		if spans is None:
+			spans = [(0, len(text))]
+		for span_start, span_end in spans:
+			for match in query.finditer(text, max(span_start, start), span_end, timeout = get_timeout(deadline)):
+				if end >= 0 and match.start() >= end:
+					return tmp, message
+				tmp.append((match.start(), match.end(), *__get_value(match)))
+				start = match.end()
 	except re.error as ex:
 		message = str(ex)
 	return tmp, message
 
+def get_timeout(deadline: float):
+	"""
+	Get the time remaining until a deadline, as a timeout for the 'regex' module, or 'None' if no deadline is specified.\n
+	Raises 'TimeoutError' if the deadline has passed.
+	"""
+	if not deadline:
+		return None
+	tmp = deadline - time.perf_counter()
+	if tmp <= 0:
+		raise TimeoutError("regex timed out")
+	return tmp
+
+def __get_value(match: re.Match):
+	"""
+	Get the value of a match the same way 'findall()' does, and its position.
+	"""
+	groups = len(match.regs) - 1
+	if not groups:
+		return match.group(), match.start()
+	elif groups == 1:
+		return match.group(1) or "", max(match.start(1), match.start())
+	return match.groups(default = ""), match.start()
+
 def replace(text: str, query: str, new = "", ignorecase: bool = True):
 	"""
 	Replace all matches from a text using the specified RegEx pattern with a new value.\n
@@ -36,7 +99,235 @@ def replace(text: str, query: str, new = "", ignorecase: bool = True):
 	tmp = ""
 	message = ""
 	try:
-		tmp = re.sub(query, new, text, flags = re.MULTILINE | (re.IGNORECASE if ignorecase else 0))
+		tmp = re.sub(query, new, text, flags = get_flags(ignorecase))
 	except re.error as ex:
 		message = str(ex)
 	return tmp, message
+
+# ----------------------------------------
+
+__QUANTIFIER = re.compile(r"\{(\d*)(?:\,(\d*))?\}[\?\+]?")
+
+__MULTILINE = re.compile(r"\\[\dsSnrWDRXvVhHpPNxuU]|\[\^|\(\?[a-zA-Z\-]*s|\n")
+
+__ESCAPES_WITH_ARGUMENTS = "0123456789gkLNpPuUx"
+
+__MAXIMUM_LITERALS = 64
+
+__MINIMUM_LITERAL = 3
+
+class __Unsupported(Exception):
+	pass
+
+def __parse_quantifier(query: str, i: int):
+	"""
+	Parse a quantifier at the specified position, if any.\n
+	Returns the minimum number of repetitions, 'True' if the atom is repeated exactly once, the maximum number of repetitions or '-1' if unbounded, and the new position.
+	"""
+	minimum, exact, maximum = 1, True, 1
+	if i < len(query):
+		if query[i] == "*":
+			minimum, exact, maximum, i = 0, False, -1, i + 1
+		elif query[i] == "?":
+			minimum, exact, maximum, i = 0, False, 1, i + 1
+		elif query[i] == "+":
+			minimum, exact, maximum, i = 1, False, -1, i + 1
+		elif query[i] == "{":
+			match = __QUANTIFIER.match(query, i)
+			if not match or not match.group(1):
+				raise __Unsupported()
+			tmp = match.group(2) if match.group(0).count(",") else match.group(1)
+			minimum, exact, maximum, i = int(match.group(1)), match.group(1) == tmp == "1", int(tmp) if tmp else -1, match.end()
+			return minimum, exact, maximum, i
+		else:
+			return minimum, exact, maximum, i
+		if i < len(query) and query[i] in "?+":
+			i += 1
+	return minimum, exact, maximum, i
+
+def __parse_branches(query: str, i: int, nested: bool = False) -> tuple[list[list[tuple]], int]:
+	"""
+	Parse alternating branches until the end of the current group.\n
+	Each atom is a tuple of its type, its value, the minimum number of repetitions, whether it is repeated exactly once, and the maximum number of repetitions or '-1' if unbounded.
+	"""
+	branches = [[]]
+	while i < len(query):
+		char = query[i]
+		if char == ")":
+			if not nested:
+				raise __Unsupported()
+			return branches, i + 1
+		elif char == "|":
+			branches.append([])
+			i += 1
+			continue
+		elif char == "\\":
+			if i + 1 >= len(query):
+				raise __Unsupported()
+			escaped = query[i + 1]
+			if escaped in __ESCAPES_WITH_ARGUMENTS:
+				raise __Unsupported()
+			atom = ("literal", escaped) if not escaped.isalnum() else ("other", None)
+			i += 2
+		elif char == "[":
+			i += 1
+			if i < len(query) and query[i] == "^":
+				i += 1
+			if i < len(query) and query[i] == "]":
+				i += 1
+			while i < len(query) and query[i] != "]":
+				if query[i] == "[":
+					raise __Unsupported()
+				i += 2 if query[i] == "\\" else 1
+			if i >= len(query):
+				raise __Unsupported()
+			atom = ("other", None)
+			i += 1
+		elif char == "(":
+			kind = "group"
+			i += 1
+			if query.startswith("?", i):
+				if query.startswith(("?:", "?>"), i):
+					i += 2
+				elif query.startswith(("?=", "?!"), i):
+					kind, i = "lookaround", i + 2
+				elif query.startswith(("?<=", "?<!"), i):
+					kind, i = "lookaround", i + 3
+				elif query.startswith(("?P<", "?<"), i):
+					i = query.find(">", i)
+					if i < 0:
+						raise __Unsupported()
+					i += 1
+				else:
+					raise __Unsupported()
+			value, i = __parse_branches(query, i, True)
+			atom = (kind, value)
+		elif char in ".^$":
+			atom = ("other", None)
+			i += 1
+		elif char in "*+?{":
+			raise __Unsupported()
+		else:
+			atom = ("literal", char)
+			i += 1
+		minimum, exact, maximum, i = __parse_quantifier(query, i)
+		branches[-1].append((*atom, minimum, exact, maximum))
+	if nested:
+		raise __Unsupported()
+	return branches, i
+
+def __get_pure_literals(branches: list[list[tuple]]) -> list[str] | None:
+	"""
+	Get all the alternatives of a group if each of them consists of plain characters only.
+	"""
+	tmp = []
+	for branch in branches:
+		if any(atom[0] != "literal" or not atom[3] for atom in branch):
+			return None
+		tmp.append("".join(atom[1] for atom in branch))
+	return tmp
+
+def __get_branch_literals(branch: list[tuple]) -> list[str]:
+	"""
+	Get the best set of literal alternatives, one of which must appear in every match of a branch.
+	"""
+	candidates = []
+	current = [""]
+	def close():
+		nonlocal current
+		if all(current):
+			candidates.append(current)
+		current = [""]
+	for kind, value, minimum, exact, _ in branch:
+		if kind == "lookaround":
+			continue
+		elif minimum < 1:
+			close()
+		elif kind == "literal":
+			current = [prefix + value for prefix in current]
+			if not exact:
+				close()
+		elif kind == "group":
+			literals = __get_pure_literals(value)
+			if literals is not None and len(current) * len(literals) <= __MAXIMUM_LITERALS:
+				current = [prefix + literal for prefix in current for literal in literals]
+				if not exact:
+					close()
+			else:
+				close()
+				literals = __get_alternatives_literals(value)
+				if literals:
+					candidates.append(literals)
+		else:
+			close()
+	close()
+	return max(candidates, key = lambda x: (min(len(y) for y in x), -len(x)), default = [])
+
+def __get_alternatives_literals(branches: list[list[tuple]]) -> list[str]:
+	"""
+	Get the literal alternatives, one of which must appear in every match of any of the branches.
+	"""
+	tmp = []
+	for branch in branches:
+		literals = __get_branch_literals(branch)
+		if not literals:
+			return []
+		tmp.extend(literals)
+	return tmp
+
+def get_literals(query: str) -> list[str]:
+	"""
+	Get the literal alternatives, one of which must appear in every match of a RegEx pattern.\n
+	Returns an empty list if no such literals can be safely extracted.
+	"""
+	tmp = []
+	try:
+		tmp = __get_alternatives_literals(__parse_branches(query, 0)[0])
+		if tmp and min(len(literal) for literal in tmp) < __MINIMUM_LITERAL:
+			tmp = []
+	except __Unsupported:
+		pass
+	return tmp
+
+def __get_nested_quantifiers(branches: list[list[tuple]]) -> tuple[bool, bool, int]:
+	"""
+	Count the groups repeated an unbounded number of times whose content can be matched in more than one way, e.g., '(a+)+' or '(\\w+\\s?)*'.\n
+	Returns 'True' if any of the branches consists of variable-length atoms only, 'True' if any of the atoms is unbounded, and the count.
+	"""
+	variable = unbounded = False
+	count = 0
+	for branch in branches:
+		fixed = False
+		for kind, value, minimum, exact, maximum in branch:
+			atom_variable, atom_unbounded = minimum != maximum, maximum < 0
+			if kind in ["group", "lookaround"]:
+				inner_variable, inner_unbounded, inner_count = __get_nested_quantifiers(value)
+				count += inner_count
+				if kind == "lookaround":
+					continue
+				if maximum < 0 and inner_variable and inner_unbounded:
+					count += 1
+				atom_variable, atom_unbounded = atom_variable or inner_variable, atom_unbounded or inner_unbounded
+			fixed = fixed or not atom_variable
+			unbounded = unbounded or atom_unbounded
+		variable = variable or not fixed
+	return variable, unbounded, count
+
+def get_nested_quantifiers(query: str):
+	"""
+	Count the nested quantifiers of a RegEx pattern that can backtrack catastrophically, e.g., '(a+)+' or '(\\w+\\s?)*'.\n
+	The check is conservative, i.e., it might miss some risky patterns, and returns zero for patterns it cannot parse.
+	"""
+	count = 0
+	try:
+		count = __get_nested_quantifiers(__parse_branches(query, 0)[0])[2]
+	except __Unsupported:
+		pass
+	return count
+
+def is_line_bound(query: str):
+	"""
+	Returns 'True' if a RegEx pattern cannot match across multiple lines.\n
+	The check is conservative, i.e., it might return 'False' for some patterns that cannot match across multiple lines.
+	"""
+	return not __MULTILINE.search(query)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+from . import config, result
+
+import io, json, os, typing
+
+def get_path(out: str):
+	"""
+	Get the full path to the journal of an output file.
+	"""
+	return f"{out}.journal"
+
+def serialize(results: result.FileResults):
+	"""
+	Serialize a file's results to a single-line JSON string.
+	"""
+	return json.dumps({"file": results.file, "digest": results.digest, "duplicate": results.duplicate, "results": {key: result.to_list(values) for key, values in results.results.items()}})
+
+def deserialize(results_json: str) -> result.FileResults:
+	"""
+	Deserialize a file's results from a single-line JSON string.
+	"""
+	tmp = json.loads(results_json)
+	return result.FileResults(tmp["file"], {key: result.from_list(values) for key, values in tmp["results"].items()}, digest = tmp.get("digest", ""), duplicate = tmp.get("duplicate", ""))
+
+def read(path: str) -> typing.Iterator[result.FileResults]:
+	"""
+	Read all the files' results from a journal one by one.\n
+	A line that was not fully written, e.g., because the previous run was killed, is skipped.
+	"""
+	with open(path, "r", encoding = "UTF-8") as stream:
+		for line in stream:
+			if line.endswith("\n"):
+				try:
+					yield deserialize(line)
+				except (ValueError, KeyError, TypeError):
+					pass
+
+def load(path: str) -> tuple[dict[str, result.FileResults] | None, str]:
+	"""
+	Load all the files' results from a journal, and remove a trailing line that was not fully written, so the journal can be appended to.\n
+	Returns an empty dictionary if the journal does not exist.\n
+	Returns 'None' and an error message on failure.
+	"""
+	tmp = {}
+	message = ""
+	if os.path.isfile(path):
+		try:
+			for entry in read(path):
+				tmp[entry.file] = entry
+			__truncate(path)
+		except Exception:
+			tmp = None
+			message = "Cannot load the journal"
+	return tmp, message
+
+def __truncate(path: str, size: int = 64 * 1024):
+	"""
+	Remove everything after the last new line from a file, reading the file backwards in blocks of the specified size.
+	"""
+	with open(path, "rb+") as stream:
+		end = position = stream.seek(0, os.SEEK_END)
+		while position > 0:
+			block = min(position, size)
+			stream.seek(position - block)
+			index = stream.read(block).rfind(b"\n")
+			if index >= 0:
+				position = position - block + index + 1
+				break
+			position -= block
+		if position < end:
+			stream.truncate(position)
+
+class Journal:
+
+	def __init__(self, path: str, resume: bool):
+		"""
+		Class for checkpointing each scraped file's results to an append-only journal.\n
+		The journal is synced to disk periodically, so at most the last few files are scraped again after a crash.\n
+		If not resuming, the previous journal is overwritten.
+		"""
+		self.__path   = path
+		self.__stream : io.TextIOWrapper | None = None
+		self.__count  = 0
+		try:
+			self.__stream = open(path, "a" if resume else "w", encoding = "UTF-8")
+		except OSError:
+			print(f"Cannot create the journal '{path}'")
+
+	def add(self, results: result.FileResults):
+		"""
+		Append a file's results to the journal.
+		"""
+		if self.__stream:
+			self.__stream.write(serialize(results) + "\n")
+			self.__stream.flush()
+			self.__count += 1
+			if self.__count % config.JOURNAL_SYNC_INTERVAL == 0:
+				os.fsync(self.__stream.fileno())
+
+	def close(self, remove: bool):
+		"""
+		Close the journal, and optionally remove it, e.g., once all the files are scraped.
+		"""
+		if self.__stream:
+			self.__stream.close()
+			self.__stream = None
+			if remove:
+				os.remove(self.__path)
+			else:
+				print(f"Journal has been saved to '{self.__path}', use '--resume' to continue")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+from . import file, result
+
+import dataclasses, json, os
+
+@dataclasses.dataclass
+class ManifestEntry:
+	"""
+	Class for storing a single scraped file, and its results.
+	"""
+	size   : int
+	mtime  : int
+	inode  : int
+	digest : str
+	results: dict[str, list[result.Result]] = dataclasses.field(default_factory = dict)
+
+@dataclasses.dataclass
+class Manifest:
+	"""
+	Class for storing all the files scraped in a previous run, and their results.
+	"""
+	entries: dict[str, ManifestEntry] = dataclasses.field(default_factory = dict)
+
+# ----------------------------------------
+
+def create_entry(stat: os.stat_result, results: result.FileResults):
+	"""
+	Create a manifest entry from a file's status and results.
+	"""
+	return ManifestEntry(stat.st_size, stat.st_mtime_ns, stat.st_ino, results.digest, results.results)
+
+def is_unchanged(entry: ManifestEntry, stat: os.stat_result):
+	"""
+	Returns 'True' if a file's size, modification time, and inode did not change since the previous run.
+	"""
+	return entry.size == stat.st_size and entry.mtime == stat.st_mtime_ns and entry.inode == stat.st_ino
+
+def serialize(manifest: Manifest):
+	"""
+	Serialize a manifest to a JSON string.
+	"""
+	tmp = {}
+	for path, entry in manifest.entries.items():
+		tmp[path] = dataclasses.asdict(entry)
+		tmp[path]["results"] = {key: result.to_list(values) for key, values in entry.results.items()}
+	return json.dumps({"schema": result.SCHEMA, "entries": tmp})
+
+def deserialize(manifest_json: str) -> tuple[Manifest | None, str]:
+	"""
+	Deserialize a manifest from a JSON string.\n
+	Returns an empty manifest if the results were serialized in a different format, i.e., all the files are scraped again.\n
+	Returns 'None' and an error message on failure.
+	"""
+	manifest = Manifest()
+	message = ""
+	try:
+		tmp = json.loads(manifest_json)
+		entries = tmp["entries"] if tmp.get("schema") == result.SCHEMA else {}
+		for path, entry in entries.items():
+			entry["results"] = {key: result.from_list(values) for key, values in entry["results"].items()}
+			manifest.entries[path] = ManifestEntry(**entry)
+	except Exception:
+		manifest = None
+		message = "Cannot deserialize the manifest"
+	return manifest, message
+
+def load(path: str) -> tuple[Manifest | None, str]:
+	"""
+	Load a manifest from a file.\n
+	Returns an empty manifest if the file does not exist.\n
+	Returns 'None' and an error message on failure.
+	"""
+	if not file.is_file(path):
+		return Manifest(), ""
+	return deserialize(file.read(path))
+
+def save(manifest: Manifest, path: str):
+	"""
+	Save a manifest to a file, replacing the previous one only once the new one is fully written.
+	"""
+	tmp = f"{path}.tmp"
+	try:
+		open(tmp, "w").write(serialize(manifest))
+		os.replace(tmp, path)
+		print(f"Manifest has been saved to '{path}'")
+	except Exception:
+		print(f"Cannot save the manifest to '{path}'")
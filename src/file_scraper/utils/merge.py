@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+from . import file, journal, jquery, result, stopwatch, template, writer
+
+import json, sys, typing
+
+def read(path: str) -> typing.Iterator[result.FileResults]:
+	"""
+	Read results from a JSON Lines output file, one record per result, or from a journal, one file per line.\n
+	Each result is returned as a separate 'FileResults' with a single template key, and the template entries that timed out on a file as a 'FileResults' without results.
+	"""
+	with open(path, "r", encoding = "UTF-8") as stream:
+		for line in stream:
+			if not line.strip():
+				continue
+			tmp = json.loads(line)
+			if "results" in tmp:
+				yield journal.deserialize(line)
+			elif "timeouts" in tmp:
+				yield result.FileResults(tmp["file"], timeouts = tmp["timeouts"], duplicate = tmp.get("duplicate", ""))
+			else:
+				offset = tmp["offset"]
+				spans = tuple((start - offset, end - offset) for start, end in tmp["matches"])
+				yield result.FileResults(tmp["file"], {tmp["key"]: [result.Result(sys.intern(tmp["text"]), offset, spans, tuple(sys.intern(decoded) for decoded in tmp["decoded"]))]}, duplicate = tmp.get("duplicate", ""))
+
+class FileMerger:
+
+	def __init__(
+		self,
+		files    : list[str],
+		template : template.Template,
+		per_page : int,
+		page_size: int,
+		out      : str
+	):
+		"""
+		Class for merging partial results, e.g., from multiple shards, and generating a single output file.\n
+		If the same scraped file is found in multiple partial results, only its results from the first one are used.
+		"""
+		self.__files     = files
+		self.__template  = template
+		self.__per_page  = per_page
+		self.__page_size = page_size
+		self.__out       = out
+
+	def run(self):
+		"""
+		Start merging.
+		"""
+		if not file.confirm_overwrite(self.__out):
+			return
+		results: dict[str, result.FileResults] = {}
+		owners : dict[str, str]                = {}
+		for path in self.__files:
+			try:
+				for entry in read(path):
+					if owners.setdefault(entry.file, path) != path:
+						continue
+					tmp = results.setdefault(entry.file, result.FileResults(entry.file, digest = entry.digest, duplicate = entry.duplicate))
+					for key, values in entry.results.items():
+						tmp.results.setdefault(key, []).extend(self.__get_values(key, values))
+					tmp.timeouts.extend(key for key in entry.timeouts if key not in tmp.timeouts)
+			except (OSError, ValueError, KeyError, TypeError) as ex:
+				print(f"Cannot read the results from '{path}': {ex}")
+		print(f"Files merged: {len(results)}")
+		if not results:
+			print("No results")
+			return
+		doc = writer.get_writer(self.__template, self.__out, self.__per_page, self.__page_size)
+		for entry in jquery.sort_by_file(list(results.values())):
+			entry.results = {key: entry.results[key] for key in self.__get_keys(entry.results)}
+			doc.add(entry)
+		stopwatch.stopwatch.stop()
+		doc.close()
+
+	def __get_values(self, key: str, values: list[result.Result]):
+		"""
+		Remove the spans of exact matches, because a JSON Lines record stores the whole result as its match.
+		"""
+		entry = self.__template.entries.get(key)
+		if entry and not entry.search:
+			for value in values:
+				value.spans = ()
+		return values
+
+	def __get_keys(self, results: dict[str, list[result.Result]]):
+		"""
+		Get the template keys of a file's results in the template order, followed by the keys not found in the template.
+		"""
+		return [key for key in self.__template.entries if key in results] + [key for key in results if key not in self.__template.entries]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+from . import grep, template
+
+import re
+
+class Prefilter:
+
+	def __init__(self, template: template.Template):
+		"""
+		Class for locating candidate regions of all the template entries in a single pass over a text.\n
+		Entries without required literals are always run on the whole text, and so are entries that can match across multiple lines, if any of their literals is found.
+		"""
+		self.__keys       = list(template.entries.keys())
+		self.__literals   : dict[str, set[str]] = {}
+		self.__line_bound : dict[str, bool]     = {}
+		self.__unfiltered : list[str]           = []
+		for key, entry in template.entries.items():
+			literals = grep.get_literals(entry.query)
+			if not literals:
+				self.__unfiltered.append(key)
+				continue
+			self.__line_bound[key] = grep.is_line_bound(entry.query)
+			for literal in literals:
+				self.__literals.setdefault(literal.lower(), set()).add(key)
+		# NOTE: Only the longest literal is reported at each position, so it must also count for all the literals it starts with.
+		for literal, keys in self.__literals.items():
+			for other, other_keys in self.__literals.items():
+				if other != literal and literal.startswith(other):
+					keys.update(other_keys)
+		self.__scanner = None
+		self.__fallback = None
+		if self.__literals:
+			query = ("|").join(re.escape(literal) for literal in sorted(self.__literals, key = len, reverse = True))
+			self.__scanner = re.compile(query)
+			self.__fallback = re.compile(query, re.IGNORECASE)
+
+	def scan(self, text: str) -> dict[str, list[tuple[int, int]]]:
+		"""
+		Get the candidate regions of a text for each template entry.\n
+		Regions are sorted, non-overlapping '(start, end)' tuples. Entries without a single candidate region are omitted.
+		"""
+		regions: dict[str, list[tuple[int, int]]] = {key: [(0, len(text))] for key in self.__unfiltered}
+		if self.__scanner:
+			done = set()
+			start = end = -1
+			scanner = self.__scanner
+			lowercase = text.lower()
+			if len(lowercase) != len(text):
+				scanner = self.__fallback
+				lowercase = text
+			match = scanner.search(lowercase)
+			while match:
+				if match.start() >= end:
+					start = text.rfind("\n", 0, match.start()) + 1
+					end = text.find("\n", match.end())
+					if end < 0:
+						end = len(text)
+				for key in self.__literals.get(match.group().lower(), self.__line_bound.keys()):
+					if key in done:
+						continue
+					if not self.__line_bound[key]:
+						regions[key] = [(0, len(text))]
+						done.add(key)
+						continue
+					spans = regions.setdefault(key, [])
+					if spans and spans[-1][1] >= start - 1:
+						if spans[-1][1] < end:
+							spans[-1] = (spans[-1][0], end)
+					else:
+						spans.append((start, end))
+				match = scanner.search(lowercase, match.start() + 1)
+		return {key: regions[key] for key in self.__keys if key in regions}
@@ -1,19 +1,109 @@
 #!/usr/bin/env python3
 
-import subprocess
+from . import archive, config
+
+import asyncio, os, subprocess, threading, typing
 
 __ENCODING = "ISO-8859-1"
 
-def run(file: str):
+COMMAND = ["rabin2", "-zzzqq"]
+"""
+Rabin2 command, without the file, run directly, i.e., without a shell.
+"""
+
+def decode(output: bytes):
+	"""
+	Decode Rabin2's output, i.e., unescape the new lines and backslashes within the extracted strings.\n
+	The output must consist of whole lines.
+	"""
+	return output.decode(__ENCODING).replace("\\n", "\n").replace("\\\\", "\\")
+
+def stream(file: str) -> typing.Iterator[str]:
+	"""
+	Run Rabin2 as a new subprocess, and read its output in pieces of whole lines instead of buffering it as a whole.\n
+	The subprocesses of all the threads are run by a single manager per process, see 'Manager'.\n
+	An archive's member is copied to a temporary file first, as Rabin2 can only read files.
+	"""
+	with archive.materialize(file) as path:
+		yield from __get_manager().stream(path)
+
+class Manager:
+
+	def __init__(self, limit: int, size: int = 1024 * 1024, pieces: int = 4):
+		"""
+		Class for running Rabin2 subprocesses for many threads on a single asyncio event loop, in a background thread.\n
+		At most the specified number of subprocesses run at a time, and the rest wait for a free slot before they are started.\n
+		The output is read in blocks of the specified size, and at most the specified number of pieces per subprocess are buffered until they are consumed.
+		"""
+		self.__loop      = asyncio.new_event_loop()
+		self.__semaphore = asyncio.Semaphore(limit)
+		self.__size      = size
+		self.__pieces    = pieces
+		threading.Thread(target = self.__loop.run_forever, daemon = True).start()
+
+	def stream(self, path: str) -> typing.Iterator[str]:
+		"""
+		Run Rabin2 on a file, and read its output in pieces of whole lines.\n
+		If the stream is closed early, the subprocess is killed.
+		"""
+		queue = asyncio.Queue(self.__pieces)
+		future = asyncio.run_coroutine_threadsafe(self.__run(path, queue), self.__loop)
+		try:
+			while (piece := asyncio.run_coroutine_threadsafe(queue.get(), self.__loop).result()) is not None:
+				if isinstance(piece, Exception):
+					raise piece
+				yield piece
+		finally:
+			future.cancel()
+
+	async def __run(self, path: str, queue: asyncio.Queue):
+		"""
+		Run Rabin2 on a file once a slot is free, and put its decoded output in the queue, followed by 'None', or by an exception on failure.
+		"""
+		try:
+			async with self.__semaphore:
+				process = await asyncio.create_subprocess_exec(*COMMAND, path, stdin = subprocess.DEVNULL, stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+				try:
+					carry = b""
+					while data := await process.stdout.read(self.__size):
+						data = carry + data
+						end = data.rfind(b"\n") + 1
+						carry = data[end:]
+						if end:
+							await queue.put(decode(data[:end]))
+					if carry:
+						await queue.put(decode(carry))
+					await process.wait()
+				finally:
+					if process.returncode is None:
+						process.kill()
+						await process.wait()
+		except Exception as ex:
+			await queue.put(ex)
+			return
+		await queue.put(None)
+
+__manager: Manager | None = None
+
+__lock = threading.Lock()
+
+def __get_manager():
 	"""
-	Run Rabin2 as a new subprocess.\n
-	Returns an empty string and an error message on failure.
+	Get the manager of the current process, and create it if it does not exist.
 	"""
-	response = ""
-	message = ""
-	try:
-		tmp = subprocess.run(f"rabin2 -zzzqq \"{file}\"", shell = True, stdout = subprocess.PIPE, stderr = subprocess.STDOUT).stdout
-		response = tmp.decode(__ENCODING).replace("\\n", "\n").replace("\\\\", "\\")
-	except Exception as ex:
-		message = str(ex)
-	return response, message
+	global __manager
+	with __lock:
+		if not __manager:
+			__manager = Manager(config.RABIN2_LIMIT or os.cpu_count() or 1)
+		return __manager
+
+def __reset():
+	"""
+	Forget the manager of the parent process, e.g., in a forked worker process, as its event loop runs in a thread that does not exist in the worker process.
+	"""
+	global __manager, __lock
+	__manager = None
+	__lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+	os.register_at_fork(after_in_child = __reset)
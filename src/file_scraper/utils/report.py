@@ -1,99 +1,304 @@
 #!/usr/bin/env python3
 
-from . import file, grep, jquery, result, scrape, template
+from . import config, file, result, template
 
-from bs4 import BeautifulSoup
+import html, io, json, os, typing
 
-import os
+DUPLICATE = "Duplicate"
+"""
+Key under which a duplicate's original file is shown.
+"""
+
+TIMEOUTS = "Timeouts"
+"""
+Key under which the template entries that timed out are shown.
+"""
+
+def get_sections(title: str, name: str = "default") -> list[str]:
+	"""
+	Split a built-in report template into the head, the part between the results and the collections, the part between the collections and the navigation, and the footer.
+	"""
+	tmp = file.read(file.get_report(name))
+	tmp = tmp.replace("</filename>", html.escape(title), 1)
+	tmp = tmp.replace("</font>", file.get_font().replace("\\", "\\\\"), 1)
+	sections = []
+	for placeholder in ["</results>", "</collections>", "</navigation>"]:
+		section, tmp = tmp.split(placeholder, 1)
+		sections.append(section)
+	sections.append(tmp)
+	return sections
+
+def get_html(value: result.Result):
+	"""
+	Escape a result, and highlight its matches and decoded values.
+	"""
+	tmp = []
+	position = 0
+	for start, end in value.spans:
+		tmp.append(html.escape(value.text[position:start], quote = False))
+		tmp.append(f"<span class=\"matched\">{html.escape(value.text[start:end], quote = False)}</span>")
+		position = end
+	tmp.append(html.escape(value.text[position:], quote = False))
+	for decoded in value.decoded:
+		tmp.append(f"\n<span class=\"decoded\">{html.escape(decoded, quote = False)}</span>")
+	return ("").join(tmp)
+
+def get_text(values: list[result.Result]):
+	"""
+	Escape and highlight the results, one result per line.
+	"""
+	return ("\n").join(get_html(value) for value in values)
+
+def get_sections_text(results: result.FileResults) -> dict[str, str]:
+	"""
+	Get a file's escaped and highlighted results for each template entry, followed by the template entries that timed out, if any.\n
+	A duplicate only refers to its original file instead.
+	"""
+	if results.duplicate:
+		return {DUPLICATE: html.escape(f"Same content as '{results.duplicate}'", quote = False)}
+	tmp = {key: get_text(values) for key, values in results.results.items()}
+	if results.timeouts:
+		tmp[TIMEOUTS] = html.escape(("\n").join(results.timeouts), quote = False)
+	return tmp
+
+def get_json(obj: typing.Any):
+	"""
+	Serialize an object to JSON that can be embedded in an HTML '<script>' element.
+	"""
+	return json.dumps(obj, ensure_ascii = False).replace("<", "\\u003c")
+
+def create_collections(template: template.Template) -> dict[str, dict[str, result.Result]]:
+	"""
+	Create an empty collection for each template entry that is collected.
+	"""
+	return {key: {} for key, entry in template.entries.items() if entry.collect}
+
+def add_to_collections(collections: dict[str, dict[str, result.Result]], results: result.FileResults):
+	"""
+	Add a file's unique results to the collections.
+	"""
+	for key, values in results.results.items():
+		if key in collections:
+			collection = collections[key]
+			for value in values:
+				collection.setdefault(value.text, value)
+
+def get_collection(collection: dict[str, result.Result]):
+	"""
+	Get a collection as a sorted list of results.
+	"""
+	return [collection[text] for text in sorted(collection, key = lambda x: x.casefold())]
 
 class Report:
 
 	def __init__(
 		self,
-		results : list[result.FileResults],
 		template: template.Template,
 		out     : str
 	):
 		"""
-		Class for creating an HTML report.
-		"""
-		self.__results  = results
-		self.__template = template
-		self.__out      = out
-		self.__soup     = ""
-
-	def generate(self):
-		"""
-		Generate an HTML report.
-		"""
-		self.__soup = file.read(file.get_report())
-		self.__soup = self.__soup.replace("</filename>", self.__out.rsplit(os.path.sep)[-1], 1)
-		self.__soup = self.__soup.replace("</font>", file.get_font().replace("\\", "\\\\"), 1)
-		self.__soup = BeautifulSoup(self.__soup, "html.parser")
-		for res in self.__results:
-			self.__add_header(res.file)
-			for key, values in res.results.items():
-				self.__add_results(key, values)
-		for key, entry in self.__template.entries.items():
-			if entry.collect:
-				collection = jquery.select_text_by_key(self.__results, key)
-				if collection:
-					self.__add_collection(key, collection)
-		self.__soup = self.__soup.prettify(formatter = "html5")
-		for highlight in scrape.Highlight:
-			self.__soup = self.__soup.replace(f"&lt;{highlight.value}&gt;", f"<span class=\"{highlight.name.lower()}\">")
-			self.__soup = self.__soup.replace(f"&lt;/{highlight.value}&gt;", "</span>")
-
-	def __add_header(self, path: str):
-		"""
-		Add a file name header.
-		"""
-		attributes = {"onclick": "collapseFile(this)"}
-		h2 = self.__soup.new_tag("h2", **attributes)
-		h2.string = path
-		self.__soup.html.body.find("div").append(h2)
-
-	def __add_results(self, key: str, values: list[result.Result]):
-		"""
-		Add results unde the file name header.
-		"""
-		attributes = {"class": key, "onclick": "collapseSingle(this)", "style": "background-color: var(--active);"}
-		if not self.__soup.html.body.nav.ul.find("button", attributes):
-			button = self.__soup.new_tag("button", **attributes)
-			button.string = key
-			li = self.__soup.new_tag("li")
-			li.append(button)
-			self.__soup.html.body.nav.ul.append(li)
-		# --------------------------------
-		attributes = {"class": key, "style": "display: block;"}
-		button = self.__soup.new_tag("button", **attributes)
-		button.string = key
-		self.__soup.html.body.find("div").append(button)
-		# --------------------------------
-		attributes = {"style": "display: block;"}
-		pre = self.__soup.new_tag("pre", **attributes)
-		pre.string = ("\n").join(value.text + value.append for value in values)
-		self.__soup.html.body.find("div").append(pre)
-
-	def __add_collection(self, key: str, values: list[result.Result]):
-		"""
-		Add a collection modal.
-		"""
-		attributes = {"class": key, "onclick": "popModal(this)", "style": "background-color: var(--inactive);"}
-		if not self.__soup.html.body.nav.ul.find("button", attributes):
-			button = self.__soup.new_tag("button", **attributes)
-			button.string = f"{key}\u2197"
-			li = self.__soup.new_tag("li")
-			li.append(button)
-			self.__soup.html.body.nav.ul.append(li)
-		# --------------------------------
-		attributes = {"class": key, "style": "display: none;"}
-		pre = self.__soup.new_tag("pre", **attributes)
-		pre.string = ("\n").join(value.text + value.append for value in values)
-		self.__soup.html.body.find_all("div", limit = 2)[1].append(pre)
+		Class for creating an HTML report.\n
+		File results are written to the output file as they arrive, so the report is never held in memory as a whole.\n
+		Only the unique results of the template entries that are collected are kept until the report is closed.
+		"""
+		self.__out         = out
+		self.__stream      : io.TextIOWrapper | None    = None
+		self.__failed      = False
+		self.__buttons     : set[str]                   = set()
+		self.__navigation  : list[str]                  = []
+		self.__collections = create_collections(template)
+		self.__sections    = get_sections(out.rsplit(os.path.sep)[-1])
+
+	def add(self, results: result.FileResults):
+		"""
+		Write a file's results to the report.\n
+		The output file is created on the first call.
+		"""
+		if not self.__open():
+			return
+		tmp = [f"<h2 onclick=\"collapseFile(this)\">{html.escape(results.file, quote = False)}</h2>\n"]
+		for key, text in get_sections_text(results).items():
+			name = html.escape(key)
+			if key not in self.__buttons:
+				self.__buttons.add(key)
+				self.__navigation.append(f"<li><button class=\"{name}\" onclick=\"collapseSingle(this)\" style=\"background-color: var(--active);\">{name}</button></li>\n")
+			tmp.append(f"<button class=\"{name}\" style=\"display: block;\">{name}</button>\n")
+			tmp.append(f"<pre style=\"display: block;\">{text}</pre>\n")
+		self.__stream.write(("").join(tmp))
+		add_to_collections(self.__collections, results)
+
+	def close(self):
+		"""
+		Write the collections, the navigation, and the footer to the report, and close the output file.
+		"""
+		if not self.__stream:
+			return
+		self.__stream.write(self.__sections[1])
+		for key, collection in self.__collections.items():
+			if collection:
+				name = html.escape(key)
+				self.__navigation.append(f"<li><button class=\"{name}\" onclick=\"popModal(this)\" style=\"background-color: var(--inactive);\">{name}\u2197</button></li>\n")
+				self.__stream.write(f"<pre class=\"{name}\" style=\"display: none;\">{get_text(get_collection(collection))}</pre>\n")
+		self.__stream.write(self.__sections[2])
+		self.__stream.write(("").join(self.__navigation))
+		self.__stream.write(self.__sections[3])
+		self.__stream.close()
+		self.__stream = None
+		print(f"Results have been saved to '{self.__out}'")
+
+	def __open(self):
+		"""
+		Create the output file and write the report head, if not already done.\n
+		Returns 'False' if the output file cannot be created.
+		"""
+		if not self.__stream and not self.__failed:
+			try:
+				self.__stream = open(self.__out, "w", errors = "ignore")
+				self.__stream.write(self.__sections[0])
+			except FileNotFoundError:
+				self.__failed = True
+				print(f"Cannot save the results to '{self.__out}'")
+		return self.__stream is not None
+
+class PaginatedReport:
+
+	def __init__(
+		self,
+		template: template.Template,
+		out     : str,
+		files   : int,
+		size    : int
+	):
+		"""
+		Class for creating an HTML report split into pages by the number of files and/or by size, with an index page.\n
+		File results are embedded in the pages as JSON chunks, which are rendered only once they are about to be scrolled into view.\n
+		The output file is the index page, which links to the pages and contains the collections.
+		"""
+		self.__out         = out
+		self.__files       = files
+		self.__size        = size
+		self.__base, self.__extension = os.path.splitext(out)
+		self.__index       : io.TextIOWrapper | None = None
+		self.__index_chunk : list[str]               = []
+		self.__failed      = False
+		self.__collections = create_collections(template)
+		self.__pages       = 0
+		self.__page        : io.TextIOWrapper | None = None
+		self.__page_chunk  : list[str]               = []
+		self.__page_files  : list[str]               = []
+		self.__page_size   = 0
+		self.__page_keys   : dict[str, None]         = {}
+
+	def add(self, results: result.FileResults):
+		"""
+		Write a file's results to the current page, and start a new page if the current one is full.\n
+		The output files are created on the first call.
+		"""
+		if self.__page and ((self.__files and len(self.__page_files) >= self.__files) or (self.__size and self.__page_size >= self.__size)):
+			self.__close_page(False)
+		if not self.__open_page():
+			return
+		sections = get_sections_text(results)
+		record = get_json({"file": results.file, "results": sections})
+		self.__page_chunk.append(record)
+		self.__page_files.append(results.file)
+		self.__page_size += len(record)
+		self.__page_keys.update(dict.fromkeys(sections))
+		if len(self.__page_chunk) >= config.REPORT_CHUNK_SIZE:
+			self.__write_chunk(self.__page, self.__page_chunk)
+		add_to_collections(self.__collections, results)
+
+	def close(self):
+		"""
+		Close the current page, and write the collections, the navigation, and the footer to the index page.
+		"""
+		if not self.__page:
+			return
+		self.__close_page(True)
+		self.__write_chunk(self.__index, self.__index_chunk)
+		sections = get_sections(self.__out.rsplit(os.path.sep)[-1], "paginated")
+		self.__index.write(sections[1])
+		navigation = [self.__get_key_button("files")]
+		for key, collection in self.__collections.items():
+			if collection:
+				navigation.append(f"<li><button data-key=\"{html.escape(key)}\" onclick=\"popModal(this)\" style=\"background-color: var(--inactive);\">{html.escape(key)}\u2197</button></li>\n")
+				self.__index.write(f"<script type=\"application/json\" data-key=\"{html.escape(key)}\">{get_json(get_text(get_collection(collection)))}</script>\n")
+		self.__index.write(sections[2])
+		self.__index.write(("").join(navigation))
+		self.__index.write(sections[3])
+		self.__index.close()
+		self.__index = None
+		print(f"Results have been saved to '{self.__out}' and {self.__pages} page(s)")
+
+	def __get_page(self, page: int):
+		"""
+		Get the full path to a page.
+		"""
+		return f"{self.__base}.{page}{self.__extension}"
 
-	def save(self):
+	def __get_key_button(self, key: str):
 		"""
-		Save the report an output file.
+		Get a navigation button that shows or hides all the results of a template entry.
 		"""
-		file.overwrite(self.__soup, self.__out)
+		return f"<li><button data-key=\"{html.escape(key)}\" onclick=\"toggleKey(this)\" style=\"background-color: var(--active);\">{html.escape(key)}</button></li>\n"
+
+	def __get_link_button(self, text: str, page: str):
+		"""
+		Get a navigation button that opens a page.
+		"""
+		return f"<li><button data-href=\"{html.escape(page.rsplit(os.path.sep)[-1])}\" onclick=\"location.href = this.dataset.href\">{text}</button></li>\n"
+
+	def __write_chunk(self, stream: io.TextIOWrapper, chunk: list[str]):
+		"""
+		Write JSON records to a page as a single chunk, and empty the chunk.
+		"""
+		if chunk:
+			stream.write(f"<div class=\"chunk\"><script type=\"application/json\">[{(',').join(chunk)}]</script></div>\n")
+			chunk.clear()
+
+	def __open_page(self):
+		"""
+		Create the next page, and the index page if not already done.\n
+		Returns 'False' if the output files cannot be created.
+		"""
+		if not self.__page and not self.__failed:
+			path = self.__get_page(self.__pages + 1)
+			try:
+				if not self.__index:
+					self.__index = open(self.__out, "w", errors = "ignore")
+					self.__index.write(get_sections(self.__out.rsplit(os.path.sep)[-1], "paginated")[0])
+				self.__page = open(path, "w", errors = "ignore")
+				self.__page.write(get_sections(path.rsplit(os.path.sep)[-1], "paginated")[0])
+				self.__pages += 1
+			except FileNotFoundError:
+				self.__failed = True
+				print(f"Cannot save the results to '{path}'")
+		return self.__page is not None
+
+	def __close_page(self, last: bool):
+		"""
+		Write the navigation and the footer to the current page, close it, and add it to the index page.
+		"""
+		path = self.__get_page(self.__pages)
+		self.__write_chunk(self.__page, self.__page_chunk)
+		sections = get_sections(path.rsplit(os.path.sep)[-1], "paginated")
+		self.__page.write(sections[1])
+		self.__page.write(sections[2])
+		navigation = [self.__get_key_button(key) for key in self.__page_keys]
+		navigation.append(self.__get_link_button("index", self.__out))
+		if self.__pages > 1:
+			navigation.append(self.__get_link_button("&#8592;", self.__get_page(self.__pages - 1)))
+		if not last:
+			navigation.append(self.__get_link_button("&#8594;", self.__get_page(self.__pages + 1)))
+		self.__page.write(("").join(navigation))
+		self.__page.write(sections[3])
+		self.__page.close()
+		self.__page = None
+		# --------------------------------
+		name = path.rsplit(os.path.sep)[-1]
+		self.__index_chunk.append(get_json({"file": f"{name} ({len(self.__page_files)} file(s))", "href": name, "results": {"files": html.escape(("\n").join(self.__page_files), quote = False)}}))
+		if len(self.__index_chunk) >= config.REPORT_CHUNK_SIZE:
+			self.__write_chunk(self.__index, self.__index_chunk)
+		self.__page_files = []
+		self.__page_size = 0
+		self.__page_keys = {}
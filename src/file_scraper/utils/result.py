@@ -1,19 +1,65 @@
 #!/usr/bin/env python3
 
-import dataclasses
+from . import stats
 
-@dataclasses.dataclass
+import dataclasses, json, sys
+
+SCHEMA = "3"
+"""
+Version of the serialized results, i.e., change it whenever the 'Result' class, or the meaning of its positions, changes.
+"""
+
+@dataclasses.dataclass(slots = True)
 class Result:
 	"""
-	Class for storing a single result.
+	Class for storing a single result.\n
+	The offset is the position of the text in the scraped [extracted] text, and the spans are the '(start, end)' positions of the matches within the text.\n
+	The class has no '__dict__', and the spans and decoded values are tuples, so millions of results can be kept in memory, e.g., when merging; highlighting is rendered only when writing.
 	"""
 	text   : str
-	append : str  = ""
+	offset : int                         = 0
+	spans  : tuple[tuple[int, int], ...] = ()
+	decoded: tuple[str, ...]             = ()
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots = True)
 class FileResults:
 	"""
-	Class for storing file results.
+	Class for storing file results.\n
+	The timeouts are the template entries that timed out, i.e., whose results might be incomplete.\n
+	Statistics are only recorded if enabled.
+	"""
+	file      : str
+	results   : dict[str, list[Result]] = dataclasses.field(default_factory = dict)
+	errors    : list[str]               = dataclasses.field(default_factory = list)
+	digest    : str                     = ""
+	unchanged : bool                    = False
+	duplicate : str                     = ""
+	timeouts  : list[str]               = dataclasses.field(default_factory = list)
+	statistics: stats.FileStats | None  = None
+
+# ----------------------------------------
+
+def serialize(results: list[Result]):
+	"""
+	Serialize a list of results to a JSON string.
+	"""
+	return json.dumps(to_list(results))
+
+def deserialize(results_json: str) -> list[Result]:
+	"""
+	Deserialize a list of results from a JSON string.
+	"""
+	return from_list(json.loads(results_json))
+
+def to_list(results: list[Result]):
+	"""
+	Convert a list of results to a JSON serializable list.
+	"""
+	return [(entry.text, entry.offset, entry.spans, entry.decoded) for entry in results]
+
+def from_list(results: list) -> list[Result]:
+	"""
+	Convert a JSON serializable list back to a list of results.\n
+	Texts and decoded values are interned, so the same value found in many files, e.g., in a journal or a manifest, is kept in memory only once.
 	"""
-	file   : str
-	results: dict[str, list[Result]] = dataclasses.field(default_factory = dict)
+	return [Result(sys.intern(text), offset, tuple((start, end) for start, end in spans), tuple(sys.intern(value) for value in decoded)) for text, offset, spans, decoded in results]
@@ -1,151 +1,380 @@
 #!/usr/bin/env python3
 
-from . import array, file, general, grep, jquery, rabin, report, result, stopwatch, string, template
+from . import archive, beautify, cache, config, directory, engine, extract, file, general, journal, manifest, result, stats, stopwatch, template, writer
 
-import alive_progress, concurrent.futures, enum, regex as re, threading
-
-class Highlight(enum.Enum):
-	"""
-	Enum containing stages.
-	"""
-	MATCHED = "file-scraper-matched"
-	DECODED = "file-scraper-decoded"
-
-def highlight_matched(matched: str):
-	"""
-	Highlight a matched string.
-	"""
-	return f"<{Highlight.MATCHED.value}>{matched}</{Highlight.MATCHED.value}>"
-
-def highlight_decoded(decoded: str):
-	"""
-	Highlight a decoded string.
-	"""
-	return f"\n<{Highlight.DECODED.value}>{decoded}</{Highlight.DECODED.value}>"
-
-# ----------------------------------------
+import alive_progress, concurrent.futures, itertools, os, queue, shutil, tempfile, threading, typing
 
 class FileScraper:
 
 	def __init__(
 		self,
-		files   : list[str],
-		template: template.Template,
-		beautify: bool,
-		threads : int,
-		out     : str,
-		debug   : bool
+		files        : typing.Iterable[directory.File],
+		template     : template.Template,
+		extractor    : extract.Extractor,
+		cache        : cache.Cache | None,
+		beautify     : bool,
+		beautify_dir : str,
+		beautify_size: int,
+		split        : int,
+		threads      : int,
+		processes    : int,
+		since        : str,
+		previous     : manifest.Manifest | None,
+		resumed      : dict[str, result.FileResults] | None,
+		dedup        : bool,
+		per_page     : int,
+		page_size    : int,
+		statistics   : str | None,
+		timeout      : float,
+		retry        : bool,
+		out          : str,
+		debug        : bool
 	):
 		"""
-		Class for file scraping.
+		Class for file scraping.\n
+		If statistics are enabled, i.e., not 'None', a summary is printed at the end, and if a path is specified, also saved to it as JSON.\n
+		If the timeout is specified, each file has a time budget in seconds, and if retrying is enabled, the timed-out template entries are run again line by line.
 		"""
-		self.__files      = files
-		self.__template   = template
-		self.__beautify   = beautify
-		self.__threads    = threads
-		self.__out        = out
-		self.__debug      = debug
-		self.__print_lock = threading.Lock()
+		self.__files          = files
+		self.__template       = template
+		self.__engine         = engine.Engine(template, extractor, cache, previous is not None, statistics is not None, timeout, retry)
+		self.__beautify       = beautify
+		self.__beautify_dir   = beautify_dir
+		self.__beautify_size  = beautify_size
+		self.__split_size     = split
+		self.__segments       : dict[str, tuple[int, list[tuple[tuple[int, int], result.FileResults]]]] = {}
+		self.__segments_lock  = threading.Lock()
+		self.__threads        = threads
+		self.__processes      = processes
+		self.__since          = since
+		self.__previous       = previous
+		self.__manifest       = manifest.Manifest()
+		self.__resumed        = resumed or {}
+		self.__resume         = resumed is not None
+		self.__stats          : dict[str, os.stat_result] = {}
+		self.__dedup          = dedup
+		self.__sizes          : dict[int, str]                      = {}
+		self.__hashed         : set[int]                            = set()
+		self.__digests        : dict[tuple[int, str], str]          = {}
+		self.__originals      : dict[str, result.FileResults]       = {}
+		self.__waiting        : dict[str, list[result.FileResults]] = {}
+		self.__per_page       = per_page
+		self.__page_size      = page_size
+		self.__statistics     = stats.Stats() if statistics is not None else None
+		self.__statistics_out = statistics
+		self.__out            = out
+		self.__debug          = debug
+		self.__print_lock     = threading.Lock()
 
 	def run(self):
 		"""
-		Start file scraping.
+		Start file scraping.\n
+		Files are scraped as soon as they are found, i.e., while the directory is still being walked.\n
+		Each scraped file is checkpointed to a journal, and if resuming, the journaled files are not scraped again.\n
+		The files with errors or timeouts are not checkpointed, i.e., they are scraped again on resume.\n
+		If the beautified files are not cached, they are written to a temporary directory, which is removed at the end.
 		"""
-		print(f"Files to scrape: {len(self.__files)}")
+		if not self.__resume and not file.confirm_overwrite(self.__out):
+			return
+		temporary = self.__beautify and not self.__beautify_dir
+		if temporary:
+			self.__beautify_dir = tempfile.mkdtemp(prefix = "file-scraper-")
 		print("Press CTRL + C to exit early - results will be saved")
-		results = []
-		with alive_progress.alive_bar(len(self.__files), title = "Progress:") as bar:
-			with concurrent.futures.ThreadPoolExecutor(max_workers = self.__threads) as executor:
-				subprocesses = []
+		doc = writer.get_writer(self.__template, self.__out, self.__per_page, self.__page_size)
+		checkpoint = journal.Journal(journal.get_path(self.__out), self.__resume)
+		interrupted = False
+		count = 0
+		success = 0
+		timeouts = 0
+		with alive_progress.alive_bar(title = "Progress:") as bar:
+			with self.__get_executor() as executor:
+				done  = queue.Queue()
+				stop  = threading.Event()
+				slots = threading.Semaphore(config.QUEUE_SIZE_PER_WORKER * (self.__processes or self.__threads))
+				producer = threading.Thread(target = self.__produce, args = (executor, done, slots, stop), daemon = True)
+				producer.start()
 				try:
-					for path in self.__files:
-						subprocesses.append(executor.submit(self.__run, path))
-					for subprocess in concurrent.futures.as_completed(subprocesses):
-						tmp: result.FileResults = subprocess.result()
-						if tmp.results:
-							results.append(tmp)
-							self.__print_success(tmp.file)
-						bar()
+					while (results := done.get()) is not None:
+						results: result.FileResults
+						if results.unchanged:
+							results.results = self.__previous.entries[results.file].results
+						for tmp in self.__get_ready(results):
+							for error in tmp.errors:
+								self.__print_exception(error)
+							for key in tmp.timeouts:
+								self.__print_timeout(f"{tmp.file}: {key}")
+							timeouts += bool(tmp.timeouts)
+							stat = self.__stats.pop(tmp.file, None)
+							if self.__previous is not None and not tmp.errors and not tmp.timeouts and stat:
+								self.__manifest.entries[tmp.file] = manifest.create_entry(stat, tmp)
+							if not tmp.errors and not tmp.timeouts and tmp.file not in self.__resumed:
+								checkpoint.add(tmp)
+							if tmp.statistics:
+								self.__statistics.add(tmp.file, tmp.statistics)
+							if tmp.results or tmp.timeouts:
+								with self.__measure("report"):
+									doc.add(tmp)
+							if tmp.results:
+								success += 1
+								self.__print_success(tmp.file)
+							count += 1
+							bar()
 				except KeyboardInterrupt:
+					interrupted = True
+					stop.set()
 					executor.shutdown(wait = True, cancel_futures = True)
-		if not results:
+		print(f"Files scraped: {count}")
+		if timeouts:
+			print(f"Files with timeouts: {timeouts}")
+		if not success:
 			print("No results")
 		else:
-			print(f"Files with valid results: {len(results)}")
-			print("Generating the report...")
-			doc = report.Report(jquery.sort_by_file(results), self.__template, self.__out)
-			doc.generate()
+			print(f"Files with valid results: {success}")
+		if success or timeouts:
 			stopwatch.stopwatch.stop()
-			doc.save()
+			with self.__measure("report"):
+				doc.close()
+		if self.__statistics:
+			self.__statistics.print_summary()
+			if self.__statistics_out:
+				self.__statistics.save(self.__statistics_out)
+		checkpoint.close(not interrupted)
+		if self.__previous is not None:
+			manifest.save(self.__manifest, self.__since)
+		if temporary:
+			shutil.rmtree(self.__beautify_dir, ignore_errors = True)
 
-	def __run(self, path: str):
+	def __measure(self, name: str):
 		"""
-		Returns searches with highlighted matches or exact matches.
+		Measure a stage that runs in the main thread, if statistics are enabled.
 		"""
-		results = result.FileResults(path)
-		if self.__beautify and path.endswith(".js"):
-			file.beautify(path)
-		response, error = rabin.run(path)
-		if error:
-			self.__print_exception(error)
-		else:
-			for key, entry in self.__template.entries.items():
-				tmp = self.__search(response, entry) if entry.search else self.__match(response, entry)
-				if tmp:
-					results.results[key] = tmp
-		return results
+		return self.__statistics.measure(name) if self.__statistics else stats.measure(None)
 
-	def __search(self, response: str, entry: template.TemplateEntry) -> list[result.Result]:
+	def __get_ready(self, results: result.FileResults) -> list[result.FileResults]:
 		"""
-		Returns searches with highlighted matches.
+		Get the results that are ready to be written.\n
+		If deduplication is enabled, a duplicate waits for its original file to be scraped, and then gets the original file's results.
 		"""
-		results = []
-		searches, error = grep.find(response, entry.search, entry.ignorecase)
-		if error:
-			self.__print_exception(error)
-		else:
-			if entry.unique:
-				searches = array.unique(searches)
-			for searched in searches:
-				tmp = result.Result(searched)
-				success = False
-				for matched in array.unique(re.findall(entry.query, tmp.text, entry.ignorecase)):
-					if not string.is_length_valid(matched, entry.minimum, entry.maximum):
-						continue
-					success = True
-					if entry.decode != template.Encoding.NONE:
-						decoded = string.decode(matched, entry.decode)
-						if not decoded or not string.is_length_valid(decoded, entry.minimum_decode, entry.maximum_decode):
-							continue
-						tmp.append += highlight_decoded(decoded)
-					tmp.text = tmp.text.replace(matched, highlight_matched(matched)).strip()
-				if success:
-					results.append(tmp)
-		return results
-
-	def __match(self, response: str, entry: template.TemplateEntry) -> list[result.Result]:
-		"""
-		Returns exact matches.
-		"""
-		results = []
-		matches, error = grep.find(response, entry.query, entry.ignorecase)
-		if error:
-			self.__print_exception(error)
-		else:
-			if entry.unique:
-				matches = array.unique(matches)
-			for matched in matches:
-				tmp = result.Result(matched)
-				if not string.is_length_valid(matched, entry.minimum, entry.maximum):
+		if not self.__dedup:
+			return [results]
+		if results.duplicate and results.file not in self.__resumed:
+			original = self.__originals.get(results.duplicate)
+			if not original:
+				self.__waiting.setdefault(results.duplicate, []).append(results)
+				return []
+			return [self.__get_duplicate(results, original)]
+		self.__originals[results.file] = results
+		return [results] + [self.__get_duplicate(duplicate, results) for duplicate in self.__waiting.pop(results.file, [])]
+
+	def __get_duplicate(self, duplicate: result.FileResults, original: result.FileResults):
+		"""
+		Attribute the original file's results to a duplicate.
+		"""
+		return result.FileResults(duplicate.file, original.results, list(original.errors), original.digest, duplicate = original.file, timeouts = list(original.timeouts))
+
+	def __get_original(self, entry: directory.File):
+		"""
+		Get the original file with the same content as the specified file, or an empty string if there is none.\n
+		Only files with the same size as an already found file are hashed, and the first file of each size is hashed only once another file of the same size is found.\n
+		A file that cannot be hashed, e.g., an unreadable file, is never a duplicate, i.e., it is scraped, and its error is reported then.
+		"""
+		size = entry.stat.st_size
+		first = self.__sizes.setdefault(size, entry.path)
+		if first == entry.path:
+			return ""
+		if size not in self.__hashed:
+			self.__hashed.add(size)
+			if digest := self.__get_hash(first):
+				self.__digests[(size, digest)] = first
+		if not (digest := self.__get_hash(entry.path)):
+			return ""
+		original = self.__digests.setdefault((size, digest), entry.path)
+		return original if original != entry.path else ""
+
+	def __get_hash(self, path: str):
+		"""
+		Get the hash of a file's content for deduplication, or an empty string on failure.
+		"""
+		try:
+			return file.get_hash(path, algorithm = "blake2b")
+		except Exception:
+			return ""
+
+	def __produce(self, executor: concurrent.futures.Executor, done: queue.Queue, slots: threading.Semaphore, stop: threading.Event):
+		"""
+		Submit the files to the executor, the largest file found so far first, keeping only a bounded number of them in flight.\n
+		Only a bounded number of the found files wait to be submitted, i.e., the files are prioritized within that window, so the memory use does not grow with the number of files.\n
+		Each scraped file's results are put in the 'done' queue, followed by 'None' once all the files are scraped.
+		"""
+		tasks = queue.PriorityQueue(config.QUEUE_LOOKAHEAD_PER_WORKER * (self.__processes or self.__threads))
+		walker = threading.Thread(target = self.__walk, args = (tasks, done, stop), daemon = True)
+		walker.start()
+		try:
+			while True:
+				while not slots.acquire(timeout = 0.5):
+					if stop.is_set():
+						return
+				while not (task := self.__get(tasks)):
+					if stop.is_set():
+						return
+				size, _, path, digest, segment, source = task
+				if stop.is_set() or path is None:
+					return
+				future = self.__submit(executor, path, digest, segment, source)
+				future.add_done_callback(lambda future, path = path, segment = segment: self.__on_done(future, path, segment, done, slots))
+		except Exception as ex:
+			self.__print_exception(str(ex))
+		finally:
+			slots.release()
+			for _ in range(config.QUEUE_SIZE_PER_WORKER * (self.__processes or self.__threads)):
+				slots.acquire()
+			done.put(None)
+
+	def __walk(self, tasks: queue.PriorityQueue, done: queue.Queue, stop: threading.Event):
+		"""
+		Put the files that need to be scraped in the 'tasks' queue, prioritized by size, as they are found, followed by a task without a path.\n
+		The walk waits while the 'tasks' queue is full.\n
+		Text files larger than the split size are split into line-aligned segments, each of which is a separate task.\n
+		JavaScript (.js) files that need to be beautified are first beautified in a separate process pool, with as many processes as specified or one per CPU, and are put in the 'tasks' queue once beautified.\n
+		The results of the journaled and unchanged files are put in the 'done' queue directly.
+		"""
+		count = itertools.count()
+		workers = self.__processes or os.cpu_count() or 1
+		beautifier = concurrent.futures.ProcessPoolExecutor(max_workers = workers, initializer = beautify.init_worker) if self.__beautify else None
+		pending: dict[concurrent.futures.Future, tuple[int, str, str]] = {}
+		try:
+			for entry in self.__files:
+				if stop.is_set():
+					return
+				path = entry.path
+				digest = ""
+				if self.__previous is not None:
+					self.__stats[path] = entry.stat
+				if path in self.__resumed:
+					done.put(self.__resumed[path])
 					continue
-				if entry.decode != template.Encoding.NONE:
-					decoded = string.decode(matched, entry.decode)
-					if not decoded or not string.is_length_valid(decoded, entry.minimum_decode, entry.maximum_decode):
+				if self.__previous is not None:
+					previous = self.__previous.entries.get(path)
+					if previous and manifest.is_unchanged(previous, entry.stat):
+						done.put(result.FileResults(path, digest = previous.digest, unchanged = True))
 						continue
-					tmp.append += highlight_decoded(decoded)
-				tmp.text = tmp.text.strip()
-				results.append(tmp)
-		return results
+					digest = previous.digest if previous else ""
+				if self.__dedup and (original := self.__get_original(entry)):
+					done.put(result.FileResults(path, duplicate = original))
+					continue
+				if beautifier and path.endswith(".js"):
+					pending[beautifier.submit(beautify.run, path, self.__beautify_dir, self.__beautify_size)] = (entry.stat.st_size, path, digest)
+					self.__put_beautified(tasks, pending, count, config.QUEUE_SIZE_PER_WORKER * workers, stop)
+					continue
+				segments = self.__get_segments(entry)
+				if len(segments) > 1:
+					with self.__segments_lock:
+						self.__segments[path] = (len(segments), [])
+					for segment in segments:
+						self.__put(tasks, (segment[0] - segment[1], next(count), path, "", segment, ""), stop)
+				else:
+					self.__put(tasks, (-entry.stat.st_size, next(count), path, digest, None, ""), stop)
+			self.__put_beautified(tasks, pending, count, 0, stop)
+		except Exception as ex:
+			self.__print_exception(str(ex))
+		finally:
+			if beautifier:
+				beautifier.shutdown(wait = False, cancel_futures = True)
+			self.__put(tasks, (1, next(count), None, "", None, ""), stop)
+
+	def __get(self, tasks: queue.PriorityQueue) -> tuple | None:
+		"""
+		Get a task from the 'tasks' queue, or 'None' if the queue stayed empty for a while.
+		"""
+		try:
+			return tasks.get(timeout = 0.5)
+		except queue.Empty:
+			return None
+
+	def __put(self, tasks: queue.PriorityQueue, task: tuple, stop: threading.Event):
+		"""
+		Put a task in the 'tasks' queue, waiting while the queue is full, unless stopped.
+		"""
+		while not stop.is_set():
+			try:
+				tasks.put(task, timeout = 0.5)
+				break
+			except queue.Full:
+				pass
+
+	def __put_beautified(self, tasks: queue.PriorityQueue, pending: dict[concurrent.futures.Future, tuple[int, str, str]], count: typing.Iterator[int], limit: int, stop: threading.Event):
+		"""
+		Put the beautified files in the 'tasks' queue, waiting until no more than the specified number of files are still being beautified.\n
+		If a file cannot be beautified, the file itself is scraped.
+		"""
+		while pending:
+			finished, _ = concurrent.futures.wait(pending, timeout = None if len(pending) > limit else 0, return_when = concurrent.futures.FIRST_COMPLETED)
+			if not finished:
+				break
+			for future in finished:
+				size, path, digest = pending.pop(future)
+				try:
+					source = future.result()
+				except Exception:
+					source = path
+				self.__put(tasks, (-size, next(count), path, digest, None, source), stop)
+
+	def __get_segments(self, entry: directory.File):
+		"""
+		Get the '(start, end)' segments of a file to scrape as separate tasks.\n
+		Only text files larger than the split size are split, and archives' members are never split.
+		"""
+		if not self.__split_size or entry.stat.st_size <= self.__split_size or archive.is_member(entry.path) or not file.is_text(entry.path):
+			return [(0, entry.stat.st_size)]
+		return file.get_segments(entry.path, entry.stat.st_size, self.__split_size)
+
+	def __on_done(self, future: concurrent.futures.Future, path: str, segment: tuple[int, int] | None, done: queue.Queue, slots: threading.Semaphore):
+		"""
+		Put a scraped file's results in the 'done' queue, and free its slot.\n
+		The results of a file's segments are put in the 'done' queue only once all the segments are scraped, merged into a single result.
+		"""
+		if not future.cancelled():
+			try:
+				tmp = future.result()
+			except Exception as ex:
+				tmp = result.FileResults(path, errors = [str(ex)])
+			if segment:
+				tmp = self.__merge_segment(path, segment, tmp)
+			if tmp:
+				done.put(tmp)
+		slots.release()
+
+	def __merge_segment(self, path: str, segment: tuple[int, int], results: result.FileResults):
+		"""
+		Store the results of a file's segment.\n
+		Returns the merged results of all the file's segments once all of them are stored, or 'None' otherwise.
+		"""
+		with self.__segments_lock:
+			count, parts = self.__segments[path]
+			parts.append((segment, results))
+			if len(parts) < count:
+				return None
+			del self.__segments[path]
+		return self.__engine.merge([results for segment, results in sorted(parts, key = lambda part: part[0])])
+
+	def __get_executor(self) -> concurrent.futures.Executor:
+		"""
+		Get a process pool if the number of processes is specified; otherwise, get a thread pool.\n
+		Each worker process receives the engine, including the compiled template, only once at startup.
+		"""
+		if self.__processes:
+			return concurrent.futures.ProcessPoolExecutor(max_workers = self.__processes, initializer = engine.init_worker, initargs = (self.__engine,))
+		return concurrent.futures.ThreadPoolExecutor(max_workers = self.__threads)
+
+	def __submit(self, executor: concurrent.futures.Executor, path: str, digest: str = "", segment: tuple[int, int] | None = None, source: str = ""):
+		"""
+		Submit a single file, or a single segment of a file, to the executor.\n
+		If the file's content hash is equal to the specified one, the file will not be scraped again.\n
+		If a source is specified, e.g., a beautified copy of the file, the source is scraped instead.
+		"""
+		if self.__processes:
+			return executor.submit(engine.run_worker, path, digest, segment, source)
+		return executor.submit(self.__engine.run, path, digest, segment, source)
 
 	def __print_success(self, message: str):
 		"""
@@ -155,6 +384,14 @@ class FileScraper:
 			with self.__print_lock:
 				general.print_yellow(message)
 
+	def __print_timeout(self, message: str):
+		"""
+		Print timeout.
+		"""
+		if self.__debug:
+			with self.__print_lock:
+				general.print_yellow(f"[ TIMEOUT ] {message}")
+
 	def __print_exception(self, message: str):
 		"""
 		Print exception.
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+from . import config
+
+import contextlib, dataclasses, heapq, json, time, typing
+
+@dataclasses.dataclass(slots = True)
+class Timing:
+	"""
+	Class for storing the wall time, the CPU time of the current thread, the number of bytes processed, and the number of calls.
+	"""
+	wall : float = 0
+	cpu  : float = 0
+	bytes: int   = 0
+	calls: int   = 0
+
+	def add(self, other: "Timing"):
+		"""
+		Add another timing to this one.
+		"""
+		self.wall  += other.wall
+		self.cpu   += other.cpu
+		self.bytes += other.bytes
+		self.calls += other.calls
+
+	def to_dict(self):
+		"""
+		Get the timing as a JSON serializable dictionary.
+		"""
+		return {"wall": round(self.wall, 6), "cpu": round(self.cpu, 6), "bytes": self.bytes, "calls": self.calls}
+
+@dataclasses.dataclass(slots = True)
+class EntryStats:
+	"""
+	Class for storing the statistics of a single template entry.\n
+	The timing includes decoding.
+	"""
+	timing  : Timing = dataclasses.field(default_factory = Timing)
+	matches : int    = 0
+	attempts: int    = 0
+	decoded : int    = 0
+	timeouts: int    = 0
+
+	def add(self, other: "EntryStats"):
+		"""
+		Add other statistics to these ones.
+		"""
+		self.timing.add(other.timing)
+		self.matches  += other.matches
+		self.attempts += other.attempts
+		self.decoded  += other.decoded
+		self.timeouts += other.timeouts
+
+	def to_dict(self):
+		"""
+		Get the statistics as a JSON serializable dictionary, including the decode success rate.
+		"""
+		return {**self.timing.to_dict(), "matches": self.matches, "attempts": self.attempts, "decoded": self.decoded, "timeouts": self.timeouts, "decode_rate": round(self.decoded / self.attempts, 4) if self.attempts else None}
+
+@dataclasses.dataclass(slots = True)
+class FileStats:
+	"""
+	Class for storing the statistics of a single scraped file, i.e., of the file as a whole, of each stage, and of each template entry.
+	"""
+	timing : Timing                = dataclasses.field(default_factory = Timing)
+	stages : dict[str, Timing]     = dataclasses.field(default_factory = dict)
+	entries: dict[str, EntryStats] = dataclasses.field(default_factory = dict)
+
+	def get_stage(self, name: str):
+		"""
+		Get the timing of a stage, and create it if it does not exist.
+		"""
+		return self.stages.setdefault(name, Timing())
+
+	def get_entry(self, key: str):
+		"""
+		Get the statistics of a template entry, and create them if they do not exist.
+		"""
+		return self.entries.setdefault(key, EntryStats())
+
+	def add(self, other: "FileStats"):
+		"""
+		Add other statistics to these ones, e.g., of another segment of the same file.
+		"""
+		self.timing.add(other.timing)
+		for name, timing in other.stages.items():
+			self.get_stage(name).add(timing)
+		for key, entry in other.entries.items():
+			self.get_entry(key).add(entry)
+
+@contextlib.contextmanager
+def measure(timing: Timing | None, bytes: int = 0):
+	"""
+	Add the wall time and the CPU time of the current thread spent in the block to a timing, if specified.
+	"""
+	if timing is None:
+		yield
+		return
+	wall = time.perf_counter()
+	cpu = time.thread_time()
+	try:
+		yield
+	finally:
+		timing.wall  += time.perf_counter() - wall
+		timing.cpu   += time.thread_time() - cpu
+		timing.bytes += bytes
+		timing.calls += 1
+
+def iterate(pieces: typing.Iterable[str], timing: Timing | None) -> typing.Iterator[str]:
+	"""
+	Add the time spent producing each text piece, e.g., extracting strings, and the pieces' total length, to a timing, if specified.
+	"""
+	if timing is None:
+		yield from pieces
+		return
+	iterator = iter(pieces)
+	while True:
+		with measure(timing):
+			piece = next(iterator, None)
+		if piece is None:
+			return
+		timing.bytes += len(piece)
+		yield piece
+
+class Stats:
+
+	def __init__(self):
+		"""
+		Class for aggregating the statistics of all the scraped files, and of the stages that run in the main thread, e.g., writing the report.\n
+		Only a bounded number of the slowest files are kept.
+		"""
+		self.__timing  = Timing()
+		self.__stages  : dict[str, Timing]     = {}
+		self.__entries : dict[str, EntryStats] = {}
+		self.__files   : list[tuple[float, str, Timing]] = []
+		self.__timeouts: dict[str, list[str]]            = {}
+
+	def add(self, path: str, file: FileStats):
+		"""
+		Add the statistics of a scraped file.
+		"""
+		self.__timing.add(file.timing)
+		for name, timing in file.stages.items():
+			self.__stages.setdefault(name, Timing()).add(timing)
+		for key, entry in file.entries.items():
+			self.__entries.setdefault(key, EntryStats()).add(entry)
+		if timeouts := [key for key, entry in file.entries.items() if entry.timeouts]:
+			self.__timeouts[path] = timeouts
+		item = (file.timing.wall, path, file.timing)
+		if len(self.__files) < config.STATS_TOP:
+			heapq.heappush(self.__files, item)
+		elif item > self.__files[0]:
+			heapq.heapreplace(self.__files, item)
+
+	def measure(self, name: str, bytes: int = 0):
+		"""
+		Measure a stage that runs in the main thread.
+		"""
+		return measure(self.__stages.setdefault(name, Timing()), bytes)
+
+	def to_dict(self):
+		"""
+		Get the statistics as a JSON serializable dictionary, with the template entries and the files sorted from the slowest, and the template entries that timed out on each file.
+		"""
+		return {
+			"files"   : self.__timing.to_dict(),
+			"stages"  : {name: timing.to_dict() for name, timing in self.__stages.items()},
+			"entries" : {key: entry.to_dict() for key, entry in sorted(self.__entries.items(), key = lambda item: -item[1].timing.wall)},
+			"slowest" : [{"file": path, **timing.to_dict()} for wall, path, timing in sorted(self.__files, reverse = True)],
+			"timeouts": self.__timeouts
+		}
+
+	def print_summary(self):
+		"""
+		Print a summary of the statistics.
+		"""
+		tmp = self.to_dict()
+		print("Stages:")
+		print(f"    {'Stage':<24}{'Wall (s)':>12}{'CPU (s)':>12}{'MB':>12}")
+		for name, timing in [("scrape [all files]", tmp["files"])] + list(tmp["stages"].items()):
+			print(f"    {name:<24}{timing['wall']:>12.3f}{timing['cpu']:>12.3f}{timing['bytes'] / 1024 ** 2:>12.2f}")
+		print("Slowest template entries:")
+		print(f"    {'Entry':<24}{'Wall (s)':>12}{'CPU (s)':>12}{'Matches':>12}{'Decoded':>20}{'Timeouts':>12}")
+		for key, entry in list(tmp["entries"].items())[:config.STATS_TOP]:
+			decoded = f"{entry['decoded']}/{entry['attempts']} ({entry['decode_rate'] * 100:.0f}%)" if entry["attempts"] else "-"
+			print(f"    {key[:23]:<24}{entry['wall']:>12.3f}{entry['cpu']:>12.3f}{entry['matches']:>12}{decoded:>20}{entry['timeouts']:>12}")
+		print("Slowest files:")
+		for entry in tmp["slowest"]:
+			print(f"    {entry['wall']:>10.3f}s {entry['bytes'] / 1024 ** 2:>10.2f} MB  {entry['file']}")
+
+	def save(self, out: str):
+		"""
+		Save the statistics to a JSON file.
+		"""
+		try:
+			with open(out, "w", encoding = "UTF-8") as stream:
+				json.dump(self.to_dict(), stream, indent = 4, ensure_ascii = False)
+			print(f"Statistics have been saved to '{out}'")
+		except OSError:
+			print(f"Cannot save the statistics to '{out}'")
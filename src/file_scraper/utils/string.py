@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
-from . import template
+from . import config, template
 
-import base64, OpenSSL.crypto, urllib.parse
+import base64, functools, OpenSSL.crypto, re, urllib.parse
 
 __ENCODING = "UTF-8"
 
+__BASE64 = re.compile(r"[A-Za-z0-9+/]*")
+
+__HEX = re.compile(r"[0-9A-Fa-f\s]*")
+
 def is_length_valid(string: str, minimum: int = 0, maximum: int = 0):
 	"""
 	Validate the length of a string.\n
@@ -18,9 +22,29 @@ def is_length_valid(string: str, minimum: int = 0, maximum: int = 0):
 		success = False
 	return success
 
+def is_base64_valid(string: str):
+	"""
+	Cheaply check if a string can be Base64 decoded.\n
+	Returns 'False' only if the string consists of Base64 characters, and their number or padding is invalid.\n
+	Any other string is left to the decoder, which discards non-Base64 characters.
+	"""
+	data = string.rstrip("=")
+	if not __BASE64.fullmatch(data):
+		return True
+	return len(data) % 4 != 1 and (data != string or len(data) % 4 == 0)
+
+def is_hex_valid(string: str):
+	"""
+	Cheaply check if a string, without prefixes and separators, can be hex decoded.\n
+	Returns 'False' if the string contains non-hex characters or an odd number of hex digits.
+	"""
+	return bool(__HEX.fullmatch(string)) and (len(string) - sum(char.isspace() for char in string)) % 2 == 0
+
+@functools.lru_cache(maxsize = config.DECODE_CACHE_SIZE)
 def decode(string: str, encoding: template.Encoding):
 	"""
 	Decode a string.\n
+	Results are cached, and strings that cannot be decoded are rejected before decoding.\n
 	Returns an empty string on failure.
 	"""
 	decoded = ""
@@ -28,9 +52,12 @@ def decode(string: str, encoding: template.Encoding):
 		if encoding == template.Encoding.URL:
 			decoded = remove_bad_chars(urllib.parse.unquote(string))
 		elif encoding == template.Encoding.BASE64:
-			decoded = remove_bad_chars(base64.b64decode(string))
+			if is_base64_valid(string):
+				decoded = remove_bad_chars(base64.b64decode(string))
 		elif encoding == template.Encoding.HEX:
-			decoded = remove_bad_chars(bytes.fromhex(string.replace("0x", "").replace("\\", "").replace("x", "")))
+			string = string.replace("0x", "").replace("\\", "").replace("x", "")
+			if is_hex_valid(string):
+				decoded = remove_bad_chars(bytes.fromhex(string))
 		elif encoding == template.Encoding.PEM:
 			if "CERTIFICATE" in string.upper():
 				decoded = remove_bad_chars(OpenSSL.crypto.dump_certificate(OpenSSL.crypto.FILETYPE_TEXT, OpenSSL.crypto.load_certificate(OpenSSL.crypto.FILETYPE_PEM, string)))
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-from . import file
+from . import file, grep
 
-import dataclasses, enum, json
+import dataclasses, enum, hashlib, json
 
 class Encoding(str, enum.Enum):
 	"""
@@ -17,7 +17,8 @@ class Encoding(str, enum.Enum):
 @dataclasses.dataclass
 class TemplateEntry:
 	"""
-	Class for storing a single entry of the extraction template.
+	Class for storing a single entry of the extraction template.\n
+	The timeout is the maximum number of seconds the entry can spend matching a single chunk of a file, zero for the default.
 	"""
 	query         : str
 	search        : bool | str = False
@@ -29,11 +30,24 @@ class TemplateEntry:
 	decode        : Encoding   = ""
 	unique        : bool       = False
 	collect       : bool       = False
+	timeout       : float      = 0
+	matcher       : grep.Matcher = dataclasses.field(default = None, init = False, repr = False, compare = False)
 
 	def __post_init__(self):
 		const = ".*"
 		if self.search:
 			self.search = const + self.query.strip(const) + const
+		self.matcher, message = grep.compile_matcher(self.query, self.search, self.ignorecase)
+		if message:
+			raise ValueError(message)
+
+	def get_fingerprint(self):
+		"""
+		Get the fingerprint of the entry, i.e., a hash of all its options that affect its results.\n
+		The timeout is excluded, i.e., changing it does not invalidate the cached results.
+		"""
+		options = {field.name: getattr(self, field.name) for field in dataclasses.fields(self) if field.init and field.name != "timeout"}
+		return hashlib.sha256(json.dumps(options, sort_keys = True).encode()).hexdigest()
 
 @dataclasses.dataclass
 class Template:
@@ -73,8 +87,7 @@ def build(query: str):
 	Build a template from the specified regular expression.
 	"""
 	template                  = Template()
-	entry                     = TemplateEntry(query, True)
-	entry.ignorecase          = True
+	entry                     = TemplateEntry(query, True, True)
 	entry.unique              = True
 	entry.collect             = True
 	template.entries["RegEx"] = entry
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 
-from . import array, config, directory, file, general, grep, template
+from . import archive, array, cache, config, directory, extract, file, general, grep, journal, manifest, template, writer
 
-import argparse, sys
+import argparse, itertools, os, sys
 
 class MyArgParser(argparse.ArgumentParser):
 
@@ -12,8 +12,11 @@ class MyArgParser(argparse.ArgumentParser):
 		print("Usage:   file-scraper -dir directory -o out          [-t template     ] [-th threads]")
 		print("Example: file-scraper -dir decoded   -o results.html [-t template.json] [-th 10     ]")
 		print("")
+		print("Merge:   file-scraper merge -o out files... [-t template]")
+		print("")
 		print("DESCRIPTION")
 		print("    Scrape files for sensitive information")
+		print("    Use 'merge' to merge partial results, e.g., from multiple shards, run 'file-scraper merge -h' for more info")
 		print("DIRECTORY")
 		print("    Directory containing files or a single file to scrape")
 		print("    -dir, --directory> = decoded | files | test.exe | etc.")
@@ -31,23 +34,127 @@ class MyArgParser(argparse.ArgumentParser):
 		print("    Overrides the excludes")
 		print("    Use comma-separated values")
 		print("    -i, --includes = java | json,xml,yaml | etc.")
+		print("ARCHIVES")
+		print("    Scrape the members of ZIP-based and tar archives, e.g., APK, IPA, JAR, ZIP, and TAR.GZ, instead of the archives themselves")
+		print("    Members are decompressed as they are scraped, i.e., archives are never extracted to disk, and nested archives are opened up to the specified depth")
+		print("    Excludes and includes are applied to the members' names, e.g., 'app.apk!/classes.dex'")
+		print("    Default depth: 3")
+		print("    -a, --archives [= 1 | 5 | etc.]")
+		print("EXTRACTOR")
+		print("    Backend to extract strings from the files with")
+		print("    Rabin2 requires Radare2 to be installed, and runs at most one subprocess per CPU at a time")
+		print("    Default: native")
+		print("    -x, --extractor = native | rabin2")
+		print("CACHE DIRECTORY")
+		print("    Directory in which to cache the results by file content and template entry")
+		print("    Unchanged files and template entries are not scraped again")
+		print("    -c, --cache-dir = cache | etc.")
+		print("SINCE")
+		print("    Manifest file of a previous run")
+		print("    Only files changed since the previous run are scraped, and the manifest is updated")
+		print("    If the manifest file does not exist, it is created")
+		print("    -s, --since = manifest.json | etc.")
+		print("RESUME")
+		print("    Resume an interrupted run from the journal next to the output file, i.e., from 'out.journal'")
+		print("    Journaled files are not scraped again, and the output file is regenerated")
+		print("    -r, --resume")
+		print("SHARD")
+		print("    Scrape only a single shard of the files, out of the specified number of shards, e.g., one per node")
+		print("    Shards are balanced by total file size, and are the same on every node finding the same files at the same paths")
+		print("    Use 'merge' to merge the results of all the shards")
+		print("    -sh, --shard = 1/4 | 2/4 | etc.")
+		print("DEDUP")
+		print("    Scrape files with the same content only once, and attribute the results to all of them")
+		print("    Duplicates are listed in the HTML report only by their original file")
+		print("    -dd, --dedup")
 		print("BEAUTIFY")
-		print("    Beautify [minified] JavaScript (.js) files")
+		print("    Beautify [minified] JavaScript (.js) files before scraping them, in a separate pool of processes")
+		print("    Files are not modified, beautified copies are cached in the cache directory if specified, or in a temporary directory")
 		print("    -b, --beautify")
+		print("BEAUTIFY SIZE")
+		print("    Maximum size of a JavaScript (.js) file to beautify, larger files are scraped as is")
+		print("    Default: 8MB")
+		print("    -bs, --beautify-size = 32MB | etc.")
+		print("SPLIT SIZE")
+		print("    Split text files larger than the specified size into segments, and scrape each segment in parallel")
+		print("    Split files are not cached")
+		print("    -ss, --split-size = 256MB | etc.")
 		print("THREADS")
 		print("    Number of parallel threads to run")
 		print("    Default: 30")
 		print("    -th, --threads = 10 | etc.")
+		print("WALK THREADS")
+		print("    Number of parallel threads to walk the directory with, i.e., to scan its subdirectories in parallel, e.g., on a network file system")
+		print("    The order of files is not preserved")
+		print("    Default: 1")
+		print("    -wt, --walk-threads = 8 | etc.")
+		print("PROCESSES")
+		print("    Number of parallel processes to run instead of threads")
+		print("    Each process uses its own CPU core for matching and decoding")
+		print("    -p, --processes = 32 | etc.")
+		print("PAGE SIZE")
+		print("    Split the report into pages by the number of files or by size, with the output file as the index page")
+		print("    Each page's results are rendered lazily, i.e., only once they are about to be scrolled into view")
+		print("    -ps, --page-size = 1000 | 50MB | etc.")
+		print("STATS")
+		print("    Record the wall and CPU time, and the bytes processed, of each stage, template entry, and file")
+		print("    Print the slowest template entries and files, match counts, and decode success rates at the end")
+		print("    Optionally, also save the statistics to a JSON file")
+		print("    -st, --stats [= stats.json | etc.]")
+		print("TIMEOUT")
+		print("    Maximum number of seconds to spend scraping a single file, or a single segment of a split file")
+		print("    Each template entry also has its own time budget per chunk of a file, see the 'timeout' template option")
+		print("    Timed-out template entries are listed per file in the output file, except in CSV, and timed-out files are not cached, journaled, or added to the manifest")
+		print("    -to, --timeout = 300 | etc.")
+		print("RETRY LINES")
+		print("    Retry the timed-out template entries line by line, with a time budget per line, skipping the lines that time out again")
+		print("    Only the template entries that cannot match across multiple lines are retried")
+		print("    -rl, --retry-lines")
 		print("OUT")
 		print("    Output file")
-		print("    -o, --out = results.html | etc.")
+		print("    Results are written in the format of the file's extension, i.e., as JSON Lines, CSV, SARIF, or otherwise, as an HTML report")
+		print("    -o, --out = results.html | results.jsonl | results.csv | results.sarif | etc.")
 		print("DEBUG")
 		print("    Enable debug output")
 		print("    -dbg, --debug")
 
 	def error(self, message):
 		if len(sys.argv) > 1:
-			print("Missing a mandatory option (-dir, -o) and/or optional (-t, -e, -i, -b, -th, -dbg)")
+			print("Missing a mandatory option (-dir, -o) and/or optional (-t, -e, -i, -a, -x, -c, -s, -r, -sh, -dd, -b, -bs, -ss, -th, -wt, -p, -ps, -st, -to, -rl, -dbg)")
+			print("Use -h or --help for more info")
+		else:
+			self.print_help()
+		exit()
+
+class MyMergeArgParser(argparse.ArgumentParser):
+
+	def print_help(self):
+		print(f"File Scraper {config.APP_VERSION} ( github.com/ivan-sincek/file-scraper )")
+		print("")
+		print("Usage:   file-scraper merge -o out          files...                  [-t template     ]")
+		print("Example: file-scraper merge -o results.html shard_1.jsonl shard_2.jsonl [-t template.json]")
+		print("")
+		print("DESCRIPTION")
+		print("    Merge partial results, e.g., from multiple shards, into a single output file")
+		print("FILES")
+		print("    JSON Lines output files or journals to merge")
+		print("    If the same scraped file is found in multiple partial results, only its results from the first one are used")
+		print("    files... = shard_1.jsonl shard_2.jsonl | results.html.journal | etc.")
+		print("TEMPLATE")
+		print("    File containing extraction details or a single RegEx that was used")
+		print("    Default: built-in JSON template file")
+		print("    -t, --template = template.json | \"secret\\: [\\w\\d]+\" | etc.")
+		print("PAGE SIZE")
+		print("    Split the report into pages by the number of files or by size, with the output file as the index page")
+		print("    -ps, --page-size = 1000 | 50MB | etc.")
+		print("OUT")
+		print("    Output file")
+		print("    Results are written in the format of the file's extension, i.e., as JSON Lines, CSV, SARIF, or otherwise, as an HTML report")
+		print("    -o, --out = results.html | results.jsonl | results.csv | results.sarif | etc.")
+
+	def error(self, message):
+		if len(sys.argv) > 2:
+			print("Missing a mandatory option (-o, files) and/or optional (-t, -ps)")
 			print("Use -h or --help for more info")
 		else:
 			self.print_help()
@@ -57,15 +164,39 @@ class Validate:
 
 	def __init__(self):
 		"""
-		Class for validating and managing CLI arguments.
+		Class for validating and managing CLI arguments.\n
+		If the first CLI argument is 'merge', the arguments of the 'merge' subcommand are validated instead.
 		"""
+		self.__merge = sys.argv[1:2] == ["merge"]
+		if self.__merge:
+			self.__parser = MyMergeArgParser()
+			self.__parser.add_argument("files"              , nargs    = "+"         , type   = str         , default = []   )
+			self.__parser.add_argument("-t"  , "--template" , required = False, type   = str         , default = ""   )
+			self.__parser.add_argument("-ps" , "--page-size", required = False, type   = str.upper   , default = ""   )
+			self.__parser.add_argument("-o"  , "--out"      , required = True , type   = str         , default = ""   )
+			return
 		self.__parser = MyArgParser()
 		self.__parser.add_argument("-dir", "--directory", required = True , type   = str         , default = ""   )
 		self.__parser.add_argument("-t"  , "--template" , required = False, type   = str         , default = ""   )
 		self.__parser.add_argument("-e"  , "--excludes" , required = False, type   = str.lower   , default = ""   )
 		self.__parser.add_argument("-i"  , "--includes" , required = False, type   = str.lower   , default = ""   )
+		self.__parser.add_argument("-a"  , "--archives" , required = False, type   = str         , default = None , nargs = "?", const = "")
+		self.__parser.add_argument("-x"  , "--extractor", required = False, type   = str.lower   , default = ""   )
+		self.__parser.add_argument("-c"  , "--cache-dir", required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-s"  , "--since"    , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-r"  , "--resume"   , required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-sh" , "--shard"    , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-dd" , "--dedup"    , required = False, action = "store_true", default = False)
 		self.__parser.add_argument("-b"  , "--beautify" , required = False, action = "store_true", default = False)
+		self.__parser.add_argument("-bs" , "--beautify-size", required = False, type = str.upper , default = ""   )
+		self.__parser.add_argument("-ss" , "--split-size", required = False, type   = str.upper   , default = ""   )
 		self.__parser.add_argument("-th" , "--threads"  , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-wt" , "--walk-threads", required = False, type = str        , default = ""   )
+		self.__parser.add_argument("-p"  , "--processes", required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-ps" , "--page-size", required = False, type   = str.upper   , default = ""   )
+		self.__parser.add_argument("-st" , "--stats"    , required = False, type   = str         , default = None , nargs = "?", const = "")
+		self.__parser.add_argument("-to" , "--timeout"  , required = False, type   = str         , default = ""   )
+		self.__parser.add_argument("-rl" , "--retry-lines", required = False, action = "store_true", default = False)
 		self.__parser.add_argument("-o"  , "--out"      , required = True , type   = str         , default = ""   )
 		self.__parser.add_argument("-dbg", "--debug"    , required = False, action = "store_true", default = False)
 
@@ -74,14 +205,40 @@ class Validate:
 		Validate and return the CLI arguments.
 		"""
 		self.__success = True
+		if self.__merge:
+			self.__args = self.__parser.parse_args(sys.argv[2:])
+			self.__validate_template()
+			self.__validate_files()
+			self.__validate_page_size()
+			return self.__success, self.__args
 		self.__args = self.__parser.parse_args()
 		self.__validate_template()
+		self.__validate_quantifiers()
 		self.__validate_excludes()
 		self.__validate_includes()
-		self.__validate_directory()
 		self.__validate_threads()
+		self.__validate_walk_threads()
+		self.__validate_shard()
+		self.__validate_archives()
+		self.__validate_directory()
+		self.__validate_extractor()
+		self.__validate_cache_dir()
+		self.__validate_since()
+		self.__validate_resume()
+		self.__validate_processes()
+		self.__validate_beautify_size()
+		self.__validate_split_size()
+		self.__validate_page_size()
+		self.__validate_stats()
+		self.__validate_timeout()
 		return self.__success, self.__args
 
+	def is_merge(self):
+		"""
+		Returns 'True' if the 'merge' subcommand is used.
+		"""
+		return self.__merge
+
 	def __error(self, message: str):
 		"""
 		Set the success flag to 'False' to prevent the main task from executing, and print an error message.
@@ -118,6 +275,16 @@ class Validate:
 				self.__error("Cannot deserialize the default template")
 		self.__args.template = tmp
 
+	def __validate_quantifiers(self):
+		"""
+		Warn about the template entries with nested quantifiers that can backtrack catastrophically, e.g., '(a+)+'.
+		"""
+		if self.__args.template:
+			for key, entry in self.__args.template.entries.items():
+				count = grep.get_nested_quantifiers(entry.query)
+				if count:
+					general.print_yellow(f"Template entry \"{key}\" has {count} nested quantifier(s) that can backtrack catastrophically, it will be stopped after {entry.timeout or config.ENTRY_TIMEOUT} second(s) per chunk")
+
 	def __validate_excludes(self):
 		tmp = []
 		if self.__args.excludes:
@@ -152,17 +319,126 @@ class Validate:
 			if not success:
 				self.__error(message)
 			else:
-				tmp = directory.filter_files(directory.list_files(self.__args.directory), self.__args.excludes, self.__args.includes)
-				if not tmp:
-					self.__error(f"No valid files were found in \"{self.__args.directory}\"")
+				tmp = directory.walk(self.__args.directory, self.__args.excludes, self.__args.includes, self.__args.walk_threads, self.__args.archives)
+				if self.__args.shard:
+					tmp = iter(directory.shard(tmp, *self.__args.shard))
+				first = next(tmp, None)
+				if not first:
+					self.__error(f"No valid files were found in \"{self.__args.directory}\"" + (" for this shard" if self.__args.shard else ""))
+				else:
+					tmp = itertools.chain([first], tmp)
 		else:
 			success, message = file.validate(self.__args.directory)
 			if not success:
 				self.__error(message)
 			else:
-				tmp = [self.__args.directory]
+				tmp = [directory.get_file(self.__args.directory)]
+				if self.__args.archives and archive.is_archive(self.__args.directory):
+					tmp = list(directory.expand(tmp[0], self.__args.archives, self.__args.excludes, self.__args.includes))
+					if not tmp:
+						self.__error(f"No valid files were found in \"{self.__args.directory}\"")
 		self.__args.directory = tmp
 
+	def __validate_files(self):
+		for path in self.__args.files:
+			success, message = file.validate(path)
+			if not success:
+				self.__error(message)
+
+	def __validate_shard(self):
+		tmp = None
+		if self.__args.shard:
+			index, separator, count = self.__args.shard.partition("/")
+			if not separator or not index.isdigit() or not count.isdigit():
+				self.__error("Shard must be in the 'index/count' format, e.g., '1/4'")
+			elif not 0 < int(index) <= int(count):
+				self.__error("Shard index must be between one and the number of shards")
+			else:
+				tmp = (int(index) - 1, int(count))
+		self.__args.shard = tmp
+
+	def __validate_archives(self):
+		tmp = 0
+		if self.__args.archives is not None:
+			tmp = config.ARCHIVE_DEPTH
+			if self.__args.archives:
+				if not self.__args.archives.isdigit():
+					self.__error("Archive depth must be numeric")
+				else:
+					tmp = int(self.__args.archives)
+					if tmp <= 0:
+						self.__error("Archive depth must be greater than zero")
+		self.__args.archives = tmp
+
+	def __validate_extractor(self):
+		tmp = extract.Extractor.NATIVE
+		if self.__args.extractor:
+			try:
+				tmp = extract.Extractor(self.__args.extractor)
+			except ValueError:
+				self.__error("Supported extractors are 'native' or 'rabin2'")
+		self.__args.extractor = tmp
+
+	def __validate_cache_dir(self):
+		tmp = None
+		self.__args.beautify_dir = ""
+		if self.__args.cache_dir:
+			if directory.exists(self.__args.cache_dir) and not directory.is_directory(self.__args.cache_dir):
+				self.__error(f"\"{self.__args.cache_dir}\" is not a directory")
+			else:
+				try:
+					directory.create(self.__args.cache_dir)
+					tmp = cache.Cache(self.__args.cache_dir)
+					if self.__args.beautify:
+						self.__args.beautify_dir = os.path.join(self.__args.cache_dir, "beautified")
+						directory.create(self.__args.beautify_dir)
+				except Exception as ex:
+					self.__error(f"Cannot open the cache in \"{self.__args.cache_dir}\": {ex}")
+		self.__args.cache_dir = tmp
+
+	def __validate_since(self):
+		tmp = None
+		if self.__args.since:
+			if directory.is_directory(self.__args.since):
+				self.__error(f"\"{self.__args.since}\" is a directory")
+			else:
+				tmp, message = manifest.load(self.__args.since)
+				if message:
+					self.__error(f"{message} from \"{self.__args.since}\"")
+		self.__args.manifest = tmp
+
+	def __validate_resume(self):
+		tmp = None
+		if self.__args.resume:
+			path = journal.get_path(self.__args.out)
+			if directory.is_directory(path):
+				self.__error(f"\"{path}\" is a directory")
+			else:
+				tmp, message = journal.load(path)
+				if message:
+					self.__error(f"{message} from \"{path}\"")
+		self.__args.resumed = tmp
+
+	def __validate_beautify_size(self):
+		tmp = config.BEAUTIFY_SIZE
+		if self.__args.beautify_size:
+			tmp, unit = self.__parse_size(self.__args.beautify_size)
+			if tmp < 0:
+				self.__error("Beautify size must be a number of bytes or a size in KB, MB, or GB")
+			elif tmp == 0:
+				self.__error("Beautify size must be greater than zero")
+		self.__args.beautify_size = tmp
+
+	def __validate_split_size(self):
+		tmp = 0
+		if self.__args.split_size:
+			tmp, unit = self.__parse_size(self.__args.split_size)
+			if tmp < 0:
+				self.__error("Split size must be a number of bytes or a size in KB, MB, or GB")
+			elif tmp == 0:
+				self.__error("Split size must be greater than zero")
+		self.__args.split_size = tmp
+
 	def __validate_threads(self):
 		tmp = 30
 		if self.__args.threads:
@@ -173,3 +449,68 @@ class Validate:
 				if tmp <= 0:
 					self.__error("Number of parallel threads must be greater than zero")
 		self.__args.threads = tmp
+
+	def __validate_walk_threads(self):
+		tmp = 1
+		if self.__args.walk_threads:
+			if not self.__args.walk_threads.isdigit():
+				self.__error("Number of parallel walk threads must be numeric")
+			else:
+				tmp = int(self.__args.walk_threads)
+				if tmp <= 0:
+					self.__error("Number of parallel walk threads must be greater than zero")
+		self.__args.walk_threads = tmp
+
+	def __validate_processes(self):
+		tmp = 0
+		if self.__args.processes:
+			if not self.__args.processes.isdigit():
+				self.__error("Number of parallel processes must be numeric")
+			else:
+				tmp = int(self.__args.processes)
+				if tmp <= 0:
+					self.__error("Number of parallel processes must be greater than zero")
+		self.__args.processes = tmp
+
+	def __parse_size(self, value: str):
+		"""
+		Parse a number with an optional 'KB', 'MB', or 'GB' unit.\n
+		Returns the number, multiplied by the unit if specified, and the unit, or '-1' if the number is not valid.
+		"""
+		for unit, multiplier in [("KB", 1024), ("MB", 1024 ** 2), ("GB", 1024 ** 3), ("", 1)]:
+			if value.endswith(unit):
+				tmp = value.removesuffix(unit).strip() if unit else value
+				return (int(tmp) * multiplier if tmp.isdigit() else -1), unit
+
+	def __validate_page_size(self):
+		files = 0
+		size = 0
+		if self.__args.page_size:
+			tmp, unit = self.__parse_size(self.__args.page_size)
+			if tmp < 0:
+				self.__error("Page size must be a number of files or a size in KB, MB, or GB")
+			elif tmp == 0:
+				self.__error("Page size must be greater than zero")
+			elif unit:
+				size = tmp
+			else:
+				files = tmp
+			if writer.get_format(self.__args.out) != writer.Format.HTML:
+				self.__error("Page size is only supported for HTML reports")
+		self.__args.per_page = files
+		self.__args.page_size = size
+
+	def __validate_stats(self):
+		if self.__args.stats and directory.is_directory(self.__args.stats):
+			self.__error(f"\"{self.__args.stats}\" is a directory")
+
+	def __validate_timeout(self):
+		tmp = 0
+		if self.__args.timeout:
+			try:
+				tmp = float(self.__args.timeout)
+				if tmp <= 0:
+					self.__error("Timeout must be greater than zero")
+			except ValueError:
+				self.__error("Timeout must be a number of seconds")
+		self.__args.timeout = tmp
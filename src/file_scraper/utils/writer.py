@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+from . import config, report, result, template
+
+import csv, enum, io, json, os, pathlib
+
+class Format(str, enum.Enum):
+	"""
+	Enum containing output formats.
+	"""
+	HTML  = "html"
+	JSONL = "jsonl"
+	CSV   = "csv"
+	SARIF = "sarif"
+
+def get_format(out: str):
+	"""
+	Get the output format from the output file's extension.\n
+	Returns 'Format.HTML' if the extension is not supported.
+	"""
+	try:
+		return Format(os.path.splitext(out)[1].lstrip(".").lower())
+	except ValueError:
+		return Format.HTML
+
+def get_writer(template: template.Template, out: str, per_page: int = 0, page_size: int = 0):
+	"""
+	Get a writer for the output file's format.\n
+	All writers write each file's results to the output file as they arrive, and have the same 'add()' and 'close()' methods.
+	"""
+	tmp = get_format(out)
+	if tmp != Format.HTML:
+		return Writer(template, out, tmp)
+	elif per_page or page_size:
+		return report.PaginatedReport(template, out, per_page, page_size)
+	return report.Report(template, out)
+
+def get_matches(value: result.Result) -> list[tuple[int, int]]:
+	"""
+	Get the absolute '(start, end)' positions of a result's matches.\n
+	If a result has no spans, the whole result is the match.
+	"""
+	return [(value.offset + start, value.offset + end) for start, end in value.spans] or [(value.offset, value.offset + len(value.text))]
+
+class Writer:
+
+	def __init__(
+		self,
+		template: template.Template,
+		out     : str,
+		format  : Format
+	):
+		"""
+		Class for writing machine-readable results, one record per result.\n
+		Records are flushed to the output file as soon as each file's results arrive.\n
+		The template entries that timed out are written as a separate JSON Lines record per file, or as SARIF tool execution notifications.
+		"""
+		self.__template = template
+		self.__out      = out
+		self.__format   = format
+		self.__stream   : io.TextIOWrapper | None = None
+		self.__csv      = None
+		self.__failed   = False
+		self.__count    = 0
+		self.__notifications: list[dict] = []
+
+	def add(self, results: result.FileResults):
+		"""
+		Write a file's results to the output file.\n
+		The output file is created on the first call.
+		"""
+		if not self.__open():
+			return
+		if results.timeouts:
+			if self.__format == Format.JSONL:
+				self.__stream.write(json.dumps(self.__get_timeouts_record(results), ensure_ascii = False) + "\n")
+			elif self.__format == Format.SARIF:
+				self.__notifications.extend(self.__get_sarif_notification(results.file, key) for key in results.timeouts)
+		for key, values in results.results.items():
+			for value in values:
+				if self.__format == Format.JSONL:
+					self.__stream.write(json.dumps(self.__get_record(results, key, value), ensure_ascii = False) + "\n")
+				elif self.__format == Format.CSV:
+					self.__csv.writerow(self.__get_row(results.file, key, value))
+				elif self.__format == Format.SARIF:
+					self.__stream.write(("," if self.__count else "") + json.dumps(self.__get_sarif_result(results.file, key, value), ensure_ascii = False))
+				self.__count += 1
+		self.__stream.flush()
+
+	def close(self):
+		"""
+		Finish and close the output file.
+		"""
+		if not self.__stream:
+			return
+		if self.__format == Format.SARIF:
+			self.__stream.write("]" + (f", \"invocations\": {json.dumps([self.__get_sarif_invocation()], ensure_ascii = False)}" if self.__notifications else "") + "}]}\n")
+		self.__stream.close()
+		self.__stream = None
+		print(f"Results have been saved to '{self.__out}'")
+
+	def __open(self):
+		"""
+		Create the output file and write the header, if not already done.\n
+		Returns 'False' if the output file cannot be created.
+		"""
+		if not self.__stream and not self.__failed:
+			try:
+				self.__stream = open(self.__out, "w", encoding = "UTF-8", newline = "" if self.__format == Format.CSV else None)
+				if self.__format == Format.CSV:
+					self.__csv = csv.writer(self.__stream)
+					self.__csv.writerow(["file", "key", "offset", "text", "matches", "decoded"])
+				elif self.__format == Format.SARIF:
+					self.__stream.write(json.dumps(self.__get_sarif_head())[:-len("[]}]}")] + "[")
+			except FileNotFoundError:
+				self.__failed = True
+				print(f"Cannot save the results to '{self.__out}'")
+		return self.__stream is not None
+
+	def __get_record(self, results: result.FileResults, key: str, value: result.Result):
+		"""
+		Get a JSON Lines record.\n
+		If the file is a duplicate, its original file is stored too.
+		"""
+		return {
+			"file"     : results.file,
+			"key"      : key,
+			"offset"   : value.offset,
+			"text"     : value.text,
+			"matches"  : get_matches(value),
+			"decoded"  : value.decoded,
+			"duplicate": results.duplicate
+		}
+
+	def __get_timeouts_record(self, results: result.FileResults):
+		"""
+		Get a JSON Lines record of the template entries that timed out, i.e., whose results might be incomplete.\n
+		Unlike the other records, it has no key.
+		"""
+		return {
+			"file"     : results.file,
+			"timeouts" : results.timeouts,
+			"duplicate": results.duplicate
+		}
+
+	def __get_row(self, path: str, key: str, value: result.Result):
+		"""
+		Get a CSV row.\n
+		Matches are stored as semicolon-separated 'start-end' positions, and decoded values are stored one per line.
+		"""
+		return [path, key, value.offset, value.text, (";").join(f"{start}-{end}" for start, end in get_matches(value)), ("\n").join(value.decoded)]
+
+	def __get_sarif_head(self):
+		"""
+		Get a SARIF log without results, with a rule for each template entry.
+		"""
+		return {
+			"$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+			"version": "2.1.0",
+			"runs": [{
+				"tool": {
+					"driver": {
+						"name"          : "File Scraper",
+						"version"       : config.APP_VERSION,
+						"informationUri": "https://github.com/ivan-sincek/file-scraper",
+						"rules"         : [{"id": key, "shortDescription": {"text": key}} for key in self.__template.entries]
+					}
+				},
+				"results": []
+			}]
+		}
+
+	def __get_sarif_result(self, path: str, key: str, value: result.Result):
+		"""
+		Get a SARIF result, with a location for each match.\n
+		Regions are character offsets in the scraped [extracted] text.
+		"""
+		uri = pathlib.Path(os.path.abspath(path)).as_uri()
+		tmp = {
+			"ruleId": key,
+			"level": "warning",
+			"message": {"text": value.text},
+			"locations": [{
+				"physicalLocation": {
+					"artifactLocation": {"uri": uri},
+					"region": {"charOffset": start, "charLength": end - start, "snippet": {"text": value.text[start - value.offset:end - value.offset]}}
+				}
+			} for start, end in get_matches(value)]
+		}
+		if value.decoded:
+			tmp["properties"] = {"decoded": value.decoded}
+		return tmp
+
+	def __get_sarif_notification(self, path: str, key: str):
+		"""
+		Get a SARIF tool execution notification for a template entry that timed out on a file.
+		"""
+		return {
+			"level": "warning",
+			"message": {"text": f"Template entry '{key}' timed out, its results might be incomplete"},
+			"locations": [{"physicalLocation": {"artifactLocation": {"uri": pathlib.Path(os.path.abspath(path)).as_uri()}}}],
+			"associatedRule": {"id": key}
+		}
+
+	def __get_sarif_invocation(self):
+		"""
+		Get a SARIF invocation with the tool execution notifications.
+		"""
+		return {"executionSuccessful": True, "toolExecutionNotifications": self.__notifications}
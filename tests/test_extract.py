@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+from file_scraper.utils import config, extract
+
+import os, tempfile, unittest
+
+class TestStrings(unittest.TestCase):
+	"""
+	A string longer than the maximum string length must be extracted in bounded pieces, without changing the extracted text.
+	"""
+
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def extract(self, data: bytes):
+		path = os.path.join(self.directory.name, "data.bin")
+		with open(path, "wb") as stream:
+			stream.write(data)
+		return list(extract.stream(path))
+
+	def test_long_strings(self):
+		size = config.MAXIMUM_STRING_LENGTH * 3 + 3
+		for name, data, text in [
+			("ascii"   , b"\x01" + b"A" * size + b"\x02abcd\x01", "A" * size + "\nabcd"),
+			("utf16le" , ("W" * size).encode("UTF-16LE") + b"\x01abcd", "W" * size + "\nabcd")
+		]:
+			with self.subTest(encoding = name):
+				pieces = self.extract(data)
+				self.assertEqual(("").join(pieces), text)
+				self.assertLessEqual(max(len(piece) for piece in pieces), config.MAXIMUM_STRING_LENGTH + 1)
+
+	def test_short_strings(self):
+		self.assertEqual(self.extract(b"abc\x01abcd\x01" + "efgh".encode("UTF-16LE") + b"ijkl"), ["abcd", "\nefgh", "\nijkl"])
+
+if __name__ == "__main__":
+	unittest.main()
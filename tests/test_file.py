@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+from file_scraper.utils import engine, extract, file, template
+
+import os, tempfile, unittest
+
+class TestOffsets(unittest.TestCase):
+	"""
+	Offsets must be the byte positions in the file, i.e., the same whether the file is split into segments or not, regardless of its new lines.
+	"""
+
+	def setUp(self):
+		entry = template.TemplateEntry(r"https?://[\w./]+", True, True)
+		self.engine = engine.Engine(template.Template({"URL": entry}), extract.Extractor.NATIVE)
+		self.directory = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def get_offsets(self, path: str, segment_size: int = 0):
+		if segment_size:
+			segments = file.get_segments(path, os.path.getsize(path), segment_size)
+			self.assertGreater(len(segments), 1)
+			results = self.engine.merge([self.engine.run(path, segment = segment) for segment in segments])
+		else:
+			results = self.engine.run(path)
+		self.assertFalse(results.errors)
+		return [(value.offset + start, value.text[start:end]) for value in results.results["URL"] for start, end in value.spans]
+
+	def test_new_lines(self):
+		for name, newline in [("lf", "\n"), ("crlf", "\r\n")]:
+			with self.subTest(newline = name):
+				path = os.path.join(self.directory.name, f"{name}.txt")
+				with open(path, "wb") as stream:
+					stream.write(newline.join(f"line {i} https://example.com/{i}" for i in range(2000)).encode())
+				with open(path, "rb") as stream:
+					data = stream.read().decode("ISO-8859-1")
+				offsets = self.get_offsets(path)
+				self.assertEqual(len(offsets), 2000)
+				self.assertEqual(offsets, self.get_offsets(path, 4096))
+				for offset, text in offsets:
+					self.assertEqual(data[offset:offset + len(text)], text)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+from file_scraper.utils import grep, prefilter, template
+
+import unittest
+
+class TestEscapes(unittest.TestCase):
+	"""
+	The arguments of escapes must never be read as required literals, i.e., the prefilter must never drop a match.
+	"""
+
+	QUERIES = [
+		(r"\x41PI_KEY=\w+"       , "API_KEY=abcdef"),
+		(r"\101PI_KEY=\w+"       , "API_KEY=abcdef"),
+		(r"\u0041PI_KEY=\w+"     , "API_KEY=abcdef"),
+		(r"\U00000041PI_KEY=\w+" , "API_KEY=abcdef"),
+		(r"\N{LATIN CAPITAL LETTER A}PI_KEY=\w+", "API_KEY=abcdef"),
+		(r"(?P<k>API)_KEY=\g<k>" , "API_KEY=API"),
+		(r"(API)_KEY=\1KEY"      , "API_KEY=APIKEY"),
+		(r"\0?API_KEY=\w+"       , "API_KEY=abcdef"),
+		(r"\p{Lu}PI_KEY=\w+"     , "API_KEY=abcdef")
+	]
+
+	def test_literals(self):
+		for query, text in self.QUERIES:
+			with self.subTest(query = query):
+				for literal in grep.get_literals(query):
+					self.assertIn(literal.lower(), text.lower())
+
+	def test_prefilter(self):
+		for query, text in self.QUERIES:
+			with self.subTest(query = query):
+				entry = template.TemplateEntry(query)
+				tmp = template.Template({"Test": entry})
+				spans = prefilter.Prefilter(tmp).scan(text).get("Test")
+				self.assertTrue(spans)
+				matches, message = grep.find_matches(text, entry.matcher.query, spans)
+				self.assertFalse(message)
+				self.assertTrue(matches)
+
+if __name__ == "__main__":
+	unittest.main()
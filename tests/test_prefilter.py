@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+from file_scraper.utils import prefilter, template
+
+import unittest
+
+class TestPrefilter(unittest.TestCase):
+	"""
+	An entry must be skipped only if none of its literals is found, and must otherwise be run on every line that can contain a match.
+	"""
+
+	def setUp(self):
+		self.prefilter = prefilter.Prefilter(template.Template({
+			"Token"   : template.TemplateEntry(r"token=\w+"),
+			"Password": template.TemplateEntry(r"password=\w+"),
+			"Pass"    : template.TemplateEntry(r"pass\w*"),
+			"PEM"     : template.TemplateEntry(r"-----BEGIN KEY-----[\s\S]+?-----END KEY-----"),
+			"Number"  : template.TemplateEntry(r"\d{4,}")
+		}))
+
+	def test_no_literals(self):
+		text = "nothing to see here"
+		self.assertEqual(self.prefilter.scan(text), {"Number": [(0, len(text))]})
+
+	def test_skip(self):
+		self.assertNotIn("Token", self.prefilter.scan("tok en=abc\nto ken=abc"))
+		self.assertNotIn("PEM", self.prefilter.scan("-----BEGIN CERT-----\nabc\n-----END CERT-----"))
+
+	def test_lines(self):
+		text = "first\ntoken=abc\nthird\nfourth\nTOKEN=def\nsixth"
+		self.assertEqual(self.prefilter.scan(text)["Token"], [(6, 15), (29, 38)])
+
+	def test_adjacent_lines(self):
+		text = "token=abc\ntoken=def\nthird"
+		self.assertEqual(self.prefilter.scan(text)["Token"], [(0, 19)])
+
+	def test_prefix_literals(self):
+		text = "first\npassword=abc\nthird"
+		regions = self.prefilter.scan(text)
+		self.assertEqual(regions["Password"], [(6, 18)])
+		self.assertEqual(regions["Pass"], [(6, 18)])
+
+	def test_multiline(self):
+		text = "first\n-----BEGIN KEY-----\nabc\n-----END KEY-----"
+		self.assertEqual(self.prefilter.scan(text)["PEM"], [(0, len(text))])
+
+	def test_ignorecase_fallback(self):
+		# NOTE: 'İ' is lowercased to two characters, so the lowercased text cannot be used for positions.
+		text = "İİİ\nfirst\nTOKEN=abc\nmiddle\nİ token=def"
+		self.assertNotEqual(len(text.lower()), len(text))
+		regions = self.prefilter.scan(text)
+		self.assertEqual(regions["Token"], [(10, 19), (27, 38)])
+		self.assertEqual([text[start:end] for start, end in regions["Token"]], ["TOKEN=abc", "İ token=def"])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+from file_scraper.utils import engine, extract, template, writer
+
+import contextlib, io, json, os, tempfile, unittest
+
+class TestOffsets(unittest.TestCase):
+	"""
+	The written offsets must point at the matches in the raw file, e.g., in a CRLF file.
+	"""
+
+	def setUp(self):
+		self.template = template.Template({"Key": template.TemplateEntry(r"key=\w+")})
+		self.directory = tempfile.TemporaryDirectory()
+		self.path = os.path.join(self.directory.name, "crlf.txt")
+		with open(self.path, "wb") as stream:
+			stream.write(("\r\n").join(f"line {i}\r\nkey=SECRET{i}" for i in range(100)).encode())
+		with open(self.path, "rb") as stream:
+			self.data = stream.read().decode("ISO-8859-1")
+
+	def tearDown(self):
+		self.directory.cleanup()
+
+	def write(self, extension: str):
+		out = os.path.join(self.directory.name, f"out.{extension}")
+		doc = writer.get_writer(self.template, out)
+		doc.add(engine.Engine(self.template, extract.Extractor.NATIVE).run(self.path))
+		with contextlib.redirect_stdout(io.StringIO()):
+			doc.close()
+		with open(out, "r", encoding = "UTF-8") as stream:
+			return stream.read()
+
+	def test_jsonl(self):
+		records = [json.loads(line) for line in self.write("jsonl").splitlines()]
+		self.assertEqual(len(records), 100)
+		for record in records:
+			self.assertEqual(self.data[record["offset"]:record["offset"] + len(record["text"])], record["text"])
+
+	def test_sarif(self):
+		results = json.loads(self.write("sarif"))["runs"][0]["results"]
+		self.assertEqual(len(results), 100)
+		for value in results:
+			region = value["locations"][0]["physicalLocation"]["region"]
+			self.assertEqual(self.data[region["charOffset"]:region["charOffset"] + region["charLength"]], region["snippet"]["text"])
+
+if __name__ == "__main__":
+	unittest.main()